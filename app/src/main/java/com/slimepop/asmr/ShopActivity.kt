@@ -195,7 +195,7 @@ class ShopActivity : AppCompatActivity() {
                 )
             }
             else -> SoundCatalog.sounds.map { sound ->
-                ShopItem(sound.id, ShopCategory.SOUND, sound.name, Monetization.subtitleForSound(sound))
+                ShopItem(sound.id, ShopCategory.SOUND, sound.name, subtitleWithSimilar(sound))
             }
         }
 
@@ -212,7 +212,8 @@ class ShopActivity : AppCompatActivity() {
             variant = shopVariant,
             entitlements = entitlements,
             coinPriceLookup = { productId -> Monetization.coinPriceFor(productId) },
-            requiresPlayPurchase = { productId -> Monetization.requiresPlayPurchase(productId) }
+            requiresPlayPurchase = { productId -> Monetization.requiresPlayPurchase(productId) },
+            recommended = if (activeTab == 1) soundsLike(equippedSound) else emptyList()
         )
         merchandised.forEach { item ->
             if (sessionImpressions.add(item.productId)) {
@@ -222,6 +223,15 @@ class ShopActivity : AppCompatActivity() {
         adapter.submit(merchandised)
     }
 
+    private fun soundsLike(soundId: String): List<String> =
+        ShopMerchandising.soundsLike(soundId, entitlements, { SoundSimilarity.similarTo(this, it) })
+
+    private fun subtitleWithSimilar(sound: SlimeSound): String {
+        val names = soundsLike(sound.id).take(2).mapNotNull { id -> SoundCatalog.sounds.find { it.id == id }?.name }
+        val subtitle = Monetization.subtitleForSound(sound)
+        return if (names.isEmpty()) subtitle else "$subtitle\nSounds like: ${names.joinToString()}"
+    }
+
     private fun resolveOrAssignVariant(): ShopMerchandising.Variant {
         val saved = ShopMerchandising.parseVariant(Prefs.getShopVariant(this))
         if (saved != null) return saved
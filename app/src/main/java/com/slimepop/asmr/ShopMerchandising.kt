@@ -31,20 +31,30 @@ object ShopMerchandising {
         variant: Variant,
         entitlements: Entitlements,
         coinPriceLookup: (String) -> Int?,
-        requiresPlayPurchase: (String) -> Boolean
+        requiresPlayPurchase: (String) -> Boolean,
+        recommended: List<String> = emptyList()
     ): List<ShopItem> {
         val decorated = items.map { item ->
             val owned = isOwned(item, entitlements)
-            val badge = badgeFor(item, owned, variant, coinPriceLookup, requiresPlayPurchase)
+            val badge = badgeFor(item, owned, variant, coinPriceLookup, requiresPlayPurchase, recommended)
             item.copy(badge = badge)
         }
 
         val indexed = decorated.withIndex()
-        val sorted = indexed.sortedWith(compareByDescending<IndexedValue<ShopItem>> { scoreFor(it.value, it.index, variant, entitlements, coinPriceLookup, requiresPlayPurchase) }
+        val sorted = indexed.sortedWith(compareByDescending<IndexedValue<ShopItem>> { scoreFor(it.value, it.index, variant, entitlements, coinPriceLookup, requiresPlayPurchase, recommended) }
             .thenBy { it.index })
         return sorted.map { it.value }
     }
 
+    fun soundsLike(
+        soundId: String,
+        entitlements: Entitlements,
+        similarLookup: (String) -> List<String>,
+        limit: Int = 3
+    ): List<String> = similarLookup(soundId)
+        .filterNot { entitlements.ownedContent.contains(it) }
+        .take(limit)
+
     private fun isOwned(item: ShopItem, entitlements: Entitlements): Boolean = when (item.category) {
         ShopCategory.SKIN, ShopCategory.SOUND -> entitlements.ownedContent.contains(item.productId)
         ShopCategory.BUNDLE, ShopCategory.REMOVE_ADS -> entitlements.ownedProducts.contains(item.productId)
@@ -55,10 +65,12 @@ object ShopMerchandising {
         owned: Boolean,
         variant: Variant,
         coinPriceLookup: (String) -> Int?,
-        requiresPlayPurchase: (String) -> Boolean
+        requiresPlayPurchase: (String) -> Boolean,
+        recommended: List<String>
     ): String? {
         if (owned) return "OWNED"
         if (item.productId == Catalog.REMOVE_ADS) return "TOP UPGRADE"
+        if (item.productId in recommended) return "LIKE YOUR SOUND"
         if (featuredOrder.containsKey(item.productId)) return "BEST SELLER"
 
         val coinPrice = coinPriceLookup(item.productId)
@@ -73,13 +85,16 @@ object ShopMerchandising {
         variant: Variant,
         entitlements: Entitlements,
         coinPriceLookup: (String) -> Int?,
-        requiresPlayPurchase: (String) -> Boolean
+        requiresPlayPurchase: (String) -> Boolean,
+        recommended: List<String>
     ): Int {
         var score = 0
         val owned = isOwned(item, entitlements)
         if (!owned) score += 10000
 
         if (item.productId == Catalog.REMOVE_ADS) score += if (variant == Variant.PREMIUM_FIRST) 9000 else 3000
+        val similarRank = recommended.indexOf(item.productId)
+        if (similarRank >= 0) score += 6000 - similarRank
         if (featuredOrder.containsKey(item.productId)) score += 5000 - (featuredOrder[item.productId] ?: 0)
 
         when (variant) {
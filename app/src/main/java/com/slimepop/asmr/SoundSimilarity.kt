@@ -0,0 +1,26 @@
+package com.slimepop.asmr
+
+import android.content.Context
+import org.json.JSONObject
+
+object SoundSimilarity {
+    // sound id -> nearest sound ids, closest first (similarity.py -> res/raw/similar_sounds.json)
+    @Volatile
+    private var neighbors: Map<String, List<String>>? = null
+
+    fun similarTo(ctx: Context, soundId: String): List<String> = table(ctx)[soundId].orEmpty()
+
+    private fun table(ctx: Context): Map<String, List<String>> {
+        neighbors?.let { return it }
+        val loaded = runCatching {
+            val text = ctx.resources.openRawResource(R.raw.similar_sounds).bufferedReader().use { it.readText() }
+            val json = JSONObject(text).getJSONObject("neighbors")
+            json.keys().asSequence().associateWith { id ->
+                val ids = json.getJSONArray(id)
+                List(ids.length()) { ids.getString(it) }
+            }
+        }.getOrDefault(emptyMap())
+        neighbors = loaded
+        return loaded
+    }
+}
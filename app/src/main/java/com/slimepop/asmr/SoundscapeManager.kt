@@ -2,6 +2,7 @@ package com.slimepop.asmr
 
 import android.content.Context
 import android.media.AudioAttributes
+import android.media.AudioManager
 import android.media.MediaPlayer
 import android.media.SoundPool
 
@@ -20,8 +21,12 @@ class SoundscapeManager(private val ctx: Context) {
             .setAudioAttributes(attrs)
             .build()
         
-        // Load the pop sound
-        val resId = ctx.resources.getIdentifier("pop", "raw", ctx.packageName)
+        // Load the pop sound, preferring the variant rendered at the mixer rate
+        val outputRate = (ctx.getSystemService(Context.AUDIO_SERVICE) as AudioManager)
+            .getProperty(AudioManager.PROPERTY_OUTPUT_SAMPLE_RATE)?.toIntOrNull() ?: 0
+        val resId = (if (outputRate != 0) ctx.resources.getIdentifier("pop_$outputRate", "raw", ctx.packageName) else 0)
+            .takeIf { it != 0 }
+            ?: ctx.resources.getIdentifier("pop", "raw", ctx.packageName)
         if (resId != 0) {
             popSoundId = soundPool?.load(ctx, resId, 1) ?: -1
         }
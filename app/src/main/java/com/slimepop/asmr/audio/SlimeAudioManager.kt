@@ -2,6 +2,7 @@ package com.slimepop.asmr.audio
 
 import android.content.Context
 import android.media.AudioAttributes
+import android.media.AudioManager
 import android.media.SoundPool
 import androidx.annotation.RawRes
 
@@ -22,6 +23,9 @@ class SlimeAudioManager(
         .build()
 
     private val loadedSoundIds = mutableMapOf<Int, Int>()      // rawResId -> soundId
+    private val outputSampleRate: Int =
+        (appContext.getSystemService(Context.AUDIO_SERVICE) as AudioManager)
+            .getProperty(AudioManager.PROPERTY_OUTPUT_SAMPLE_RATE)?.toIntOrNull() ?: 0
     private val activeLoops = mutableMapOf<String, Int>()       // loopKey -> streamId
 
     var sfxVolume: Float = 1.0f
@@ -37,11 +41,26 @@ class SlimeAudioManager(
         }
 
     /**
-     * Preload a resource. Call during loading screen / onCreate.
+     * The `<name>_<rate>` variant of a raw resource rendered at the device's
+     * mixer rate (oneshots.py), so playback skips the platform resampler.
+     * Falls back to the resource itself.
+     */
+    @RawRes
+    fun nativeVariant(@RawRes resId: Int): Int {
+        if (outputSampleRate == 0) return resId
+        val res = appContext.resources
+        val name = res.getResourceEntryName(resId)
+        val variant = res.getIdentifier("${name}_$outputSampleRate", "raw", appContext.packageName)
+        return if (variant != 0) variant else resId
+    }
+
+    /**
+     * Preload a resource (its native-rate variant when there is one).
+     * Call during loading screen / onCreate.
      */
     fun preload(@RawRes resId: Int) {
         if (loadedSoundIds.containsKey(resId)) return
-        val soundId = soundPool.load(appContext, resId, 1)
+        val soundId = soundPool.load(appContext, nativeVariant(resId), 1)
         loadedSoundIds[resId] = soundId
     }
 
@@ -0,0 +1,209 @@
+package com.slimepop.asmr.audio
+
+import org.json.JSONArray
+import org.json.JSONObject
+import kotlin.math.PI
+import kotlin.math.abs
+import kotlin.math.cos
+import kotlin.math.exp
+import kotlin.math.sin
+import kotlin.math.sqrt
+
+/**
+ * Renders a synth_params.py record ("slimepop-synth" v1) to mono samples.
+ * Port of synth_params.render_record; SynthConformanceTest checks it against
+ * the reference vectors in src/test/resources/synth_conformance.json.
+ */
+object SynthRenderer {
+    const val FORMAT = "slimepop-synth"
+    const val VERSION = 1
+
+    private val GOLDEN = 0x9E3779B97F4A7C15uL.toLong()
+    private val MIX1 = 0xBF58476D1CE4E5B9uL.toLong()
+    private val MIX2 = 0x94D049BB133111EBuL.toLong()
+
+    fun render(record: JSONObject, length: Int = record.getInt("length")): FloatArray {
+        require(record.getString("format") == FORMAT && record.getInt("version") == VERSION) {
+            "unsupported synth record ${record.optString("format")} v${record.optInt("version")}"
+        }
+        val n = length
+        val rate = record.getInt("rate")
+        val nodes = record.getJSONArray("nodes")
+        val out = ArrayList<DoubleArray>(nodes.length())
+        for (i in 0 until nodes.length()) {
+            val node = nodes.getJSONArray(i)
+            val y = when (val op = node.getString(0)) {
+                "const" -> DoubleArray(n) { node.getDouble(1) }
+                "sine" -> {
+                    val cycles = node.getDouble(1)
+                    val amp = node.getDouble(2)
+                    DoubleArray(n) { amp * sin(2 * PI * cycles * it / n) }
+                }
+                "noise" -> {
+                    val scale = node.getDouble(2)
+                    val u = splitmixUniform(node.getLong(1), n)
+                    DoubleArray(n) { scale * (2 * u[it] - 1) }
+                }
+                "filter" -> periodicFilter(doubles(node.getJSONArray(2)), doubles(node.getJSONArray(3)), out[node.getInt(1)])
+                "reverb" -> reverb(
+                    out[node.getInt(1)], node.getLong(2), node.getInt(3), node.getDouble(4),
+                    doubles(node.getJSONArray(5)), doubles(node.getJSONArray(6)), node.getDouble(7), rate
+                )
+                "add", "sub", "mul" -> {
+                    val x = out[node.getInt(1)]
+                    val z = out[node.getInt(2)]
+                    when (op) {
+                        "add" -> DoubleArray(n) { x[it] + z[it] }
+                        "sub" -> DoubleArray(n) { x[it] - z[it] }
+                        else -> DoubleArray(n) { x[it] * z[it] }
+                    }
+                }
+                else -> throw IllegalArgumentException("unknown synth op $op")
+            }
+            out.add(y)
+        }
+        val y = out.last()
+        var peak = 0.0
+        for (v in y) peak = maxOf(peak, abs(v))
+        val gain = record.getDouble("peak") / (peak + 1e-12)
+        return FloatArray(n) { (y[it] * gain).toFloat() }
+    }
+
+    /** First n outputs of splitmix64 seeded with seed, as doubles in [0, 1) from their top 53 bits. */
+    fun splitmixUniform(seed: Long, n: Int): DoubleArray = DoubleArray(n) {
+        var z = seed + (it + 1).toLong() * GOLDEN
+        z = (z xor (z ushr 30)) * MIX1
+        z = (z xor (z ushr 27)) * MIX2
+        z = z xor (z ushr 31)
+        (z ushr 11).toDouble() * TWO_POW_MINUS_53
+    }
+
+    private const val TWO_POW_MINUS_53 = 1.0 / 9007199254740992.0
+
+    private fun doubles(a: JSONArray) = DoubleArray(a.length()) { a.getDouble(it) }
+
+    /** IIR, transposed direct form II (as scipy's lfilter) from state; returns the final state. */
+    private fun lfilter(b: DoubleArray, a: DoubleArray, x: DoubleArray, y: DoubleArray, state: DoubleArray): DoubleArray {
+        val order = maxOf(a.size, b.size)
+        val bn = DoubleArray(order) { if (it < b.size) b[it] / a[0] else 0.0 }
+        val an = DoubleArray(order) { if (it < a.size) a[it] / a[0] else 0.0 }
+        val z = state.copyOf()
+        for (k in x.indices) {
+            val xn = x[k]
+            val yn = z[0] + bn[0] * xn
+            for (i in 0 until order - 2) {
+                z[i] = z[i + 1] + xn * bn[i + 1] - yn * an[i + 1]
+            }
+            z[order - 2] = xn * bn[order - 1] - yn * an[order - 1]
+            y[k] = yn
+        }
+        return z
+    }
+
+    /** Filter whose state is settled by one pass over the loop, so the output is periodic. */
+    private fun periodicFilter(b: DoubleArray, a: DoubleArray, x: DoubleArray): DoubleArray {
+        val y = DoubleArray(x.size)
+        val settled = lfilter(b, a, x, y, DoubleArray(maxOf(a.size, b.size) - 1))
+        lfilter(b, a, x, y, settled)
+        return y
+    }
+
+    /**
+     * Uniform splitmix64 noise through the damping filter (from rest) under an
+     * exponential decay reaching -60 dB at rt60, scaled to unit energy.
+     */
+    private fun reverbIr(irSeed: Long, irLength: Int, rt60: Double, b: DoubleArray, a: DoubleArray, rate: Int): DoubleArray {
+        val u = splitmixUniform(irSeed, irLength)
+        val noise = DoubleArray(irLength) { 2 * u[it] - 1 }
+        val ir = DoubleArray(irLength)
+        lfilter(b, a, noise, ir, DoubleArray(maxOf(a.size, b.size) - 1))
+        var energy = 0.0
+        for (i in ir.indices) {
+            ir[i] *= exp(-6.91 * (i.toDouble() / rate) / rt60)
+            energy += ir[i] * ir[i]
+        }
+        val norm = sqrt(energy)
+        for (i in ir.indices) ir[i] /= norm
+        return ir
+    }
+
+    /** Circular convolution with the IR folded onto the loop, wet matched to the dry RMS. */
+    private fun reverb(
+        x: DoubleArray, irSeed: Long, irLength: Int, rt60: Double,
+        b: DoubleArray, a: DoubleArray, wet: Double, rate: Int
+    ): DoubleArray {
+        val n = x.size
+        val ir = reverbIr(irSeed, irLength, rt60, b, a, rate)
+        val folded = DoubleArray(n)
+        for (i in ir.indices) folded[i % n] += ir[i]
+        val wetY = circularConvolve(x, folded)
+        var dry = 0.0
+        var wetEnergy = 0.0
+        for (i in 0 until n) {
+            dry += x[i] * x[i]
+            wetEnergy += wetY[i] * wetY[i]
+        }
+        val gain = sqrt((dry / n) / (wetEnergy / n + 1e-20))
+        return DoubleArray(n) { (1.0 - wet) * x[it] + wet * (wetY[it] * gain) }
+    }
+
+    /** Circular convolution of two length-n arrays through a zero-padded power-of-two FFT. */
+    private fun circularConvolve(x: DoubleArray, h: DoubleArray): DoubleArray {
+        val n = x.size
+        var size = 1
+        while (size < 2 * n) size = size shl 1
+        val xr = x.copyOf(size)
+        val xi = DoubleArray(size)
+        val hr = h.copyOf(size)
+        val hi = DoubleArray(size)
+        fft(xr, xi, false)
+        fft(hr, hi, false)
+        for (k in 0 until size) {
+            val re = xr[k] * hr[k] - xi[k] * hi[k]
+            val im = xr[k] * hi[k] + xi[k] * hr[k]
+            xr[k] = re
+            xi[k] = im
+        }
+        fft(xr, xi, true)
+        return DoubleArray(n) { (xr[it] + xr[it + n]) / size }
+    }
+
+    /** In-place iterative radix-2 FFT (unscaled; inverse uses the conjugate twiddles). */
+    private fun fft(re: DoubleArray, im: DoubleArray, inverse: Boolean) {
+        val size = re.size
+        var j = 0
+        for (i in 1 until size) {
+            var bit = size shr 1
+            while ((j and bit) != 0) {
+                j = j xor bit
+                bit = bit shr 1
+            }
+            j = j xor bit
+            if (i < j) {
+                var t = re[i]; re[i] = re[j]; re[j] = t
+                t = im[i]; im[i] = im[j]; im[j] = t
+            }
+        }
+        var len = 2
+        while (len <= size) {
+            val half = len shr 1
+            val step = (if (inverse) 2 else -2) * PI / len
+            for (k in 0 until half) {
+                val wr = cos(step * k)
+                val wi = sin(step * k)
+                var start = k
+                while (start < size) {
+                    val p = start + half
+                    val tr = re[p] * wr - im[p] * wi
+                    val ti = re[p] * wi + im[p] * wr
+                    re[p] = re[start] - tr
+                    im[p] = im[start] - ti
+                    re[start] += tr
+                    im[start] += ti
+                    start += len
+                }
+            }
+            len = len shl 1
+        }
+    }
+}
@@ -0,0 +1,46 @@
+package com.slimepop.asmr.audio
+
+import org.json.JSONObject
+import org.junit.Assert.assertTrue
+import org.junit.Test
+import java.nio.ByteBuffer
+import java.nio.ByteOrder
+import java.util.Base64
+import kotlin.math.abs
+
+/**
+ * Renders every vector of synth_conformance.json (written by
+ * `synth_params.py --vectors`) at its record's length and compares the
+ * stored excerpt around the loop point within the suite's tolerance.
+ */
+class SynthConformanceTest {
+    @Test
+    fun rendersConformanceVectorsWithinTolerance() {
+        val text = javaClass.classLoader!!.getResource("synth_conformance.json")!!.readText()
+        val suite = JSONObject(text)
+        val tolerance = suite.getDouble("tolerance")
+        val vectors = suite.getJSONArray("vectors")
+        assertTrue(vectors.length() > 0)
+
+        for (i in 0 until vectors.length()) {
+            val vector = vectors.getJSONObject(i)
+            val record = vector.getJSONObject("record")
+            val length = vector.getInt("length")
+            val offset = vector.getInt("offset")
+            val expected = decodeSamples(vector.getString("samples"))
+            val rendered = SynthRenderer.render(record, length)
+
+            var maxError = 0.0
+            for (j in expected.indices) {
+                val got = rendered[(offset + j) % length]
+                maxError = maxOf(maxError, abs(got.toDouble() - expected[j].toDouble()))
+            }
+            assertTrue("${record.getString("name")}: max error $maxError > $tolerance", maxError <= tolerance)
+        }
+    }
+
+    private fun decodeSamples(b64: String): FloatArray {
+        val buffer = ByteBuffer.wrap(Base64.getDecoder().decode(b64)).order(ByteOrder.LITTLE_ENDIAN)
+        return FloatArray(buffer.remaining() / 4) { buffer.getFloat() }
+    }
+}
@@ -0,0 +1,367 @@
+"""
+Local audition server for generator iteration.
+
+  python audition.py [--port 8765]
+
+Serves any SOUND_MAP entry or pop variant on demand on localhost:
+
+  GET /              tiny player page (WebSocket + Web Audio)
+  GET /sounds        JSON list of ids
+  GET /render/<id>   16-bit WAV of one render
+  GET /ws            WebSocket: send an id as text; the reply is a JSON "pcm"
+                     header, int16 little-endian binary chunks, then "end".
+                     The server pushes {"type": "changed", "ids": [...]} when
+                     an edit changes what a generator would render.
+
+Watched sources (sounds.py, pop.py, slimepop2.py) are reloaded when they
+change. Each render is cached under sounds.code_fingerprint() of the
+generator's code plus every helper and constant it reaches, so an edit
+re-renders only the generators it affects, and only those that have already
+been auditioned.
+"""
+
+import argparse
+import base64
+import hashlib
+import importlib
+import io
+import json
+import os
+import struct
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import pop
+import slimepop2
+import sounds
+
+WATCHED = [sounds, pop, slimepop2]
+# id -> (module name, function name); each returns samples at the module's rate
+POP_VARIANTS = {
+    "pop": ("pop", "generate_pop_option2"),
+    "pop_soundpack": ("slimepop2", "pop_sound"),
+}
+CHUNK_SAMPLES = 16384
+POLL_SECONDS = 0.5
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+render_lock = threading.Lock()   # renders swap sounds.SR, so one at a time
+cache = {}                       # id -> (fingerprint, int16 pcm bytes, rate)
+clients = set()
+clients_lock = threading.Lock()
+
+
+# ----------------------------
+# Rendering & fingerprints
+# ----------------------------
+
+def sound_ids():
+    return list(sounds.SOUND_MAP) + list(POP_VARIANTS)
+
+
+def render_plan(sound_id):
+    """
+    (fingerprint, render) for an id; render() returns (float samples, rate).
+    """
+    if sound_id in sounds.SOUND_MAP:
+        fn, rate = sounds.sound_entry(sound_id)
+        fp = sounds.code_fingerprint(sounds, [fn, sounds.render_sound, sounds.make_loop_perfect], repr(rate))
+
+        def render():
+            x, r = sounds.render_sound(sound_id)
+            with sounds.render_rate(r):
+                return sounds.make_loop_perfect(x), r
+        return fp, render
+
+    module_name, fn_name = POP_VARIANTS[sound_id]
+    module = importlib.import_module(module_name)
+    fn = getattr(module, fn_name)
+    rate = getattr(module, "SAMPLE_RATE", None) or module.SR
+    return sounds.code_fingerprint(module, [fn], repr(rate)), lambda: (np.asarray(fn(), dtype=np.float32), rate)
+
+
+def seed_for(sound_id):
+    # fixed per id, so a re-render after an edit is comparable with the last one
+    return int(hashlib.sha1(sound_id.encode()).hexdigest()[:8], 16)
+
+
+def get_render(sound_id):
+    """
+    Returns (int16 pcm bytes, rate, cached?, render ms).
+    """
+    with render_lock:
+        fp, render = render_plan(sound_id)
+        hit = cache.get(sound_id)
+        if hit and hit[0] == fp:
+            return hit[1], hit[2], True, 0.0
+
+        t0 = time.perf_counter()
+        np.random.seed(seed_for(sound_id))
+        x, rate = render()
+        pcm = (np.clip(x, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        cache[sound_id] = (fp, pcm, rate)
+        return pcm, rate, False, (time.perf_counter() - t0) * 1000
+
+
+def wav_bytes(pcm, rate):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm)
+    return buf.getvalue()
+
+
+# ----------------------------
+# Hot reload
+# ----------------------------
+
+def stale_ids():
+    """
+    Cached ids whose fingerprint no longer matches the loaded source.
+    """
+    changed = []
+    for sound_id in list(cache):
+        try:
+            fp, _ = render_plan(sound_id)
+        except (KeyError, AttributeError):
+            fp = None   # removed from the map
+        if fp != cache[sound_id][0]:
+            changed.append(sound_id)
+    return changed
+
+
+def watch():
+    mtimes = {m.__name__: os.path.getmtime(m.__file__) for m in WATCHED}
+    while True:
+        time.sleep(POLL_SECONDS)
+        edited = [m for m in WATCHED if os.path.getmtime(m.__file__) != mtimes[m.__name__]]
+        if not edited:
+            continue
+        with render_lock:
+            for module in edited:
+                mtimes[module.__name__] = os.path.getmtime(module.__file__)
+                try:
+                    importlib.reload(module)
+                except Exception as e:   # keep serving the last good version
+                    print(f"reload {module.__name__} failed: {e!r}")
+            changed = stale_ids()
+
+        for sound_id in changed:
+            try:
+                _, _, _, ms = get_render(sound_id)
+                print(f"re-rendered {sound_id} in {ms:.0f} ms")
+            except Exception as e:
+                cache.pop(sound_id, None)
+                print(f"render {sound_id} failed: {e!r}")
+        if changed:
+            broadcast({"type": "changed", "ids": changed})
+
+
+# ----------------------------
+# HTTP + WebSocket
+# ----------------------------
+
+class WebSocket:
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+        self.lock = threading.Lock()
+        self.fragments = (None, [])   # (opcode, payloads) of a message still arriving
+
+    def send(self, payload, opcode):
+        n = len(payload)
+        if n < 126:
+            header = struct.pack("!BB", 0x80 | opcode, n)
+        elif n < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+        with self.lock:
+            self.wfile.write(header + payload)
+            self.wfile.flush()
+
+    def send_json(self, obj):
+        self.send(json.dumps(obj).encode(), 0x1)
+
+    def recv_frame(self):
+        """
+        Next (opcode, payload, fin); client frames are always masked.
+        """
+        b0, b1 = struct.unpack("!BB", self.rfile.read(2))
+        n = b1 & 0x7F
+        if n == 126:
+            n = struct.unpack("!H", self.rfile.read(2))[0]
+        elif n == 127:
+            n = struct.unpack("!Q", self.rfile.read(8))[0]
+        mask = self.rfile.read(4) if b1 & 0x80 else b"\0\0\0\0"
+        data = bytearray(self.rfile.read(n))
+        for i in range(n):
+            data[i] ^= mask[i % 4]
+        return b0 & 0x0F, bytes(data), bool(b0 & 0x80)
+
+    def recv(self):
+        """
+        Next (opcode, payload) with fragmented messages reassembled from
+        their continuation frames (opcode 0x0). Control frames may arrive
+        between fragments and are returned as they come.
+        """
+        while True:
+            op, data, fin = self.recv_frame()
+            if op >= 0x8:
+                return op, data
+            opcode, parts = self.fragments if op == 0x0 else (op, [])
+            parts.append(data)
+            if fin:
+                self.fragments = (None, [])
+                return opcode, b"".join(parts)
+            self.fragments = (opcode, parts)
+
+
+def broadcast(obj):
+    with clients_lock:
+        targets = list(clients)
+    for ws in targets:
+        try:
+            ws.send_json(obj)
+        except OSError:
+            pass
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # RFC 6455 upgrades answer with an HTTP/1.1 101
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def reply(self, body, content_type, status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/":
+            self.reply(PAGE.encode(), "text/html; charset=utf-8")
+        elif self.path == "/sounds":
+            self.reply(json.dumps(sound_ids()).encode(), "application/json")
+        elif self.path.startswith("/render/"):
+            sound_id = self.path[len("/render/"):].removesuffix(".wav")
+            if sound_id not in sound_ids():
+                self.reply(b"unknown id", "text/plain", 404)
+                return
+            pcm, rate, _, _ = get_render(sound_id)
+            self.reply(wav_bytes(pcm, rate), "audio/wav")
+        elif self.path == "/ws" and self.headers.get("Upgrade", "").lower() == "websocket":
+            self.serve_websocket()
+        else:
+            self.reply(b"not found", "text/plain", 404)
+
+    def serve_websocket(self):
+        key = self.headers["Sec-WebSocket-Key"]
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.close_connection = True
+
+        ws = WebSocket(self.rfile, self.wfile)
+        with clients_lock:
+            clients.add(ws)
+        try:
+            while True:
+                opcode, data = ws.recv()
+                if opcode == 0x8:
+                    ws.send(data[:2], 0x8)   # echo the status code, then close
+                    break
+                if opcode == 0x9:
+                    ws.send(data, 0xA)
+                elif opcode == 0x1:
+                    self.stream(ws, data.decode().strip())
+        except (OSError, struct.error):
+            pass
+        finally:
+            with clients_lock:
+                clients.discard(ws)
+
+    def stream(self, ws, sound_id):
+        if sound_id not in sound_ids():
+            ws.send_json({"type": "error", "id": sound_id, "error": "unknown id"})
+            return
+        try:
+            pcm, rate, cached, ms = get_render(sound_id)
+        except Exception as e:
+            ws.send_json({"type": "error", "id": sound_id, "error": repr(e)})
+            return
+        ws.send_json({"type": "pcm", "id": sound_id, "sample_rate": rate, "length": len(pcm) // 2,
+                      "cached": cached, "render_ms": round(ms, 1)})
+        step = CHUNK_SAMPLES * 2
+        for i in range(0, len(pcm), step):
+            ws.send(pcm[i:i + step], 0x2)
+        ws.send_json({"type": "end", "id": sound_id})
+
+
+PAGE = """<!doctype html>
+<meta charset="utf-8"><title>SlimePop audition</title>
+<style>body{font:14px sans-serif;margin:1em}button{margin:2px}#st{margin:.5em 0;color:#555}</style>
+<div id="st">connecting…</div><label><input type="checkbox" id="loop" checked> loop</label>
+<div id="ids"></div>
+<script>
+const ctx = new AudioContext(), st = document.getElementById("st");
+let ws, current = null, head = null, chunks = [], src = null;
+function play() {
+  const n = chunks.reduce((a, c) => a + c.length, 0);
+  const buf = ctx.createBuffer(1, Math.max(1, n), head.sample_rate), ch = buf.getChannelData(0);
+  let o = 0;
+  for (const c of chunks) { for (let i = 0; i < c.length; i++) ch[o + i] = c[i] / 32768; o += c.length; }
+  if (src) src.stop();
+  src = ctx.createBufferSource(); src.buffer = buf; src.loop = document.getElementById("loop").checked;
+  src.connect(ctx.destination); src.start();
+}
+function request(id) { current = id; ctx.resume(); ws.send(id); }
+function connect() {
+  ws = new WebSocket(`ws://${location.host}/ws`); ws.binaryType = "arraybuffer";
+  ws.onopen = () => st.textContent = "ready";
+  ws.onclose = () => { st.textContent = "disconnected, retrying…"; setTimeout(connect, 1000); };
+  ws.onmessage = (e) => {
+    if (e.data instanceof ArrayBuffer) { chunks.push(new Int16Array(e.data)); return; }
+    const m = JSON.parse(e.data);
+    if (m.type === "pcm") { head = m; chunks = []; }
+    else if (m.type === "end") { play(); st.textContent = `${m.id}: ${head.cached ? "cached" : head.render_ms + " ms"}`; }
+    else if (m.type === "changed" && m.ids.includes(current)) request(current);
+    else if (m.type === "error") st.textContent = `${m.id}: ${m.error}`;
+  };
+}
+fetch("/sounds").then(r => r.json()).then(ids => {
+  const box = document.getElementById("ids");
+  for (const id of ids) { const b = document.createElement("button"); b.textContent = id; b.onclick = () => request(id); box.appendChild(b); }
+});
+connect();
+</script>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audition generators with hot reload on localhost.")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    threading.Thread(target=watch, daemon=True).start()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"Auditioning on http://127.0.0.1:{args.port}/ (watching {', '.join(m.__name__ + '.py' for m in WATCHED)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
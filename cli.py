@@ -0,0 +1,58 @@
+"""
+Single entry point for the asset and store tooling:
+
+  python cli.py <task> [task options...]
+
+Task modules are imported only when their task runs, so listing tasks or
+running a light one never loads numpy, scipy, soundfile or google-auth.
+"""
+
+import importlib
+import sys
+
+# task -> (module with a main(), summary)
+TASKS = {
+    "pop": ("pop", "snappy bubble pop -> app/src/main/res/raw/pop.wav"),
+    "oneshots": ("oneshots", "48 kHz / 44.1 kHz onset-trimmed pop + bubble_pop variants -> res/raw"),
+    "soundpacks": ("slimepop2", "no-noise soundpack_XXX.wav library + pop -> res/raw"),
+    "soundpacks-noise": ("slimepop", "original noise-based soundpacks + pop -> res/raw"),
+    "asmr": ("sounds", "loop-perfect ASMR catalog -> exported_sounds/ (MP3 + OGG)"),
+    "soundscapes": ("soundscapes", "pre-mixed multi-layer soundscapes -> exported_sounds/"),
+    "codecs": ("codec_bench", "decode-cost benchmark per codec/bitrate -> exported_sounds/codec_bench.json"),
+    "dedup": ("fingerprints", "exact and near-duplicate report -> exported_sounds/fingerprints.json"),
+    "seeds": ("seed_sweep", "best-of-K seed per random sound -> exported_sounds/seeds.json"),
+    "similar": ("similarity", "top-k 'sounds like this one' table of the soundpacks -> exported_sounds/similar_sounds.json"),
+    "synth": ("synth_params", "compact synthesis records of graph generators -> exported_sounds/synth_params.json"),
+    "sprites": ("sprites", "indexed sprite packs of one-shots and loops -> exported_sounds/"),
+    "audition": ("audition", "localhost audition server with hot reload of edited generators"),
+    "sync": ("sync_assets", "copy changed exports into res/raw, prune orphans, report missing ids"),
+    "skus": ("create_skus", "create/update Play Console one-time products from the catalogs"),
+}
+
+
+def usage():
+    width = max(len(t) for t in TASKS)
+    lines = ["usage: cli.py <task> [task options...]", "", "tasks:"]
+    lines += [f"  {task.ljust(width)}  {summary}" for task, (_, summary) in TASKS.items()]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0
+    task, rest = argv[0], argv[1:]
+    if task not in TASKS:
+        print(f"unknown task {task!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    module = importlib.import_module(TASKS[task][0])
+    # task mains parse sys.argv themselves; make their --help read "cli.py <task>"
+    sys.argv = [f"cli.py {task}"] + rest
+    module.main()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
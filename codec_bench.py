@@ -0,0 +1,192 @@
+"""
+Decode-cost benchmark for the exported catalog.
+
+Every SOUND_MAP entry is rendered and finished the way the export does it,
+then encoded once per codec and setting in CANDIDATES (WAV, the MP3 and OGG
+bitrate ladders, Opus) and decoded `--repeats` times to 16-bit PCM, which is
+what Android's decoders hand to SoundPool / AudioTrack. Per candidate:
+
+  samples_per_ms    decode throughput (channels x frames over the fastest
+                    full decode; the minimum is the least noisy estimate)
+  decode_ms         that fastest full decode of the loop
+  first_sample_ms   fastest time from open to the first FIRST_BLOCK frames
+  peak_kib          peak Python-side allocation of one full decode
+  distance_db       log-spectral distance to the 16-bit source (see
+                    sounds.spectral_distance), so a cheap decode is never
+                    bought with an audible loss
+  decode_load       DECODE_CLASS[codec] x channels x seconds at 44.1 kHz:
+                    the deterministic decode-cost estimate the pick uses
+
+The recommendation per sound is the smallest candidate within
+--max-distance whose decode_load is within --max-decode-load (the cheapest
+passing one when none is): decode cost only buys a larger file when the
+small ones are too heavy, so an uncompressed WAV is never picked over an MP3
+in budget. `python sounds.py --codec-table` exports that format too
+and marks it in loop_points.json, and sync_assets.py ships it to res/raw.
+
+The pick depends only on the audio and the encoders, never on timings, so
+it is the same on every machine and a build can consume the table. The
+measured columns are libsndfile on the host recorded under "host": for
+comparing codecs by hand, not inputs to the recommendation.
+
+Output:
+  exported_sounds/codec_bench.json  {host, sounds: {id: {rate, channels, seconds, recommended, candidates}}}
+"""
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import sounds
+
+OPUS_LADDER = ["24k", "32k", "48k", sounds.OPUS_BITRATE]
+CANDIDATES = ([("wav", None)] +
+              [("mp3", b) for b in sounds.MP3_BITRATE_LADDER] +
+              [("ogg", q) for q in sounds.OGG_QUALITY_LADDER] +
+              [("opus", b) for b in OPUS_LADDER])
+REPEATS = 5
+FIRST_BLOCK = 1024   # frames that count as "first sample" (one SoundPool buffer)
+# relative decode cost per output sample, MP3 = 1; from the ordering libsndfile
+# and the Android decoders agree on (PCM is a copy, Vorbis and Opus do more
+# work per sample than MP3)
+DECODE_CLASS = {"wav": 0.05, "mp3": 1.0, "ogg": 1.5, "opus": 1.5}
+MAX_DECODE_LOAD = 24.0   # decode_load a recommended candidate may have: 8 s of 44.1 kHz stereo Vorbis
+
+
+def can_encode(fmt, rate):
+    return sounds.backend_for(fmt, rate) == "soundfile" or sounds.ffmpeg_available()
+
+
+def decode_cost(path, repeats=REPEATS):
+    """
+    (samples per ms, ms for the full decode, ms to the first block, peak
+    KiB) for decoding path to int16, best of `repeats` runs.
+    """
+    import soundfile as sf
+    full, first = [], []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        with sf.SoundFile(path) as f:
+            f.read(FIRST_BLOCK, dtype="int16")
+        first.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        pcm, _ = sf.read(path, dtype="int16")
+        full.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    sf.read(path, dtype="int16")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return pcm.size / (min(full) * 1000), min(full) * 1000, min(first) * 1000, peak / 1024
+
+
+def decode_load(fmt, channels, frames, rate):
+    """
+    Deterministic decode-cost estimate: DECODE_CLASS[fmt] x channels x the
+    seconds of audio, in seconds at 44.1 kHz (decoders work per output sample).
+    """
+    return DECODE_CLASS[fmt] * channels * frames / 44100.0
+
+
+def host_info():
+    import soundfile as sf
+    return {"machine": platform.machine(), "processor": platform.processor() or None,
+            "system": platform.system(), "python": platform.python_version(),
+            "libsndfile": sf.__libsndfile_version__}
+
+
+def bench_sound(name, td, candidates=CANDIDATES, repeats=REPEATS):
+    """
+    (rate, channels, seconds, [candidate dict]) for one sound.
+    """
+    import soundfile as sf
+    x, rate = sounds.render_sound(name)
+    with sounds.render_rate(rate):
+        x = sounds.make_loop_perfect(x)
+    channels, frames = (1 if x.ndim == 1 else x.shape[0]), x.shape[-1]
+
+    # score against what the encoders receive (16-bit PCM), as --optimize does
+    src = os.path.join(td, f"{name}.src.wav")
+    sounds.write_wav(src, x, rate)
+    ref, _ = sf.read(src, dtype="float32")
+
+    results = []
+    for i, (fmt, setting) in enumerate(candidates):
+        if not can_encode(fmt, rate):
+            continue
+        path = os.path.join(td, f"{name}_{i}.{fmt}")
+        sounds.encode_audio(x, path, fmt, setting, rate, src)
+        decoded, _ = sf.read(path, dtype="float32")
+        dist = sounds.spectral_distance(ref, sounds.align_to_reference(ref, decoded), rate)
+        samples_per_ms, decode_ms, first_ms, peak_kib = decode_cost(path, repeats)
+        results.append({
+            "format": fmt, "setting": setting, "bytes": os.path.getsize(path),
+            "distance_db": round(dist, 2), "samples_per_ms": round(samples_per_ms, 1),
+            "decode_ms": round(decode_ms, 3),
+            "first_sample_ms": round(first_ms, 3), "peak_kib": round(peak_kib, 1),
+            "decode_load": round(decode_load(fmt, channels, frames, rate), 3),
+        })
+    return rate, channels, frames / rate, results
+
+
+def recommend(candidates, max_distance=sounds.MAX_SPECTRAL_DISTANCE_DB, max_load=MAX_DECODE_LOAD):
+    passing = [c for c in candidates if c["distance_db"] <= max_distance] or candidates
+    in_budget = [c for c in passing if c["decode_load"] <= max_load]
+    if in_budget:
+        return min(in_budget, key=lambda c: (c["bytes"], c["decode_load"]))
+    return min(passing, key=lambda c: (c["decode_load"], c["bytes"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark decode cost per codec and setting and pick a format per sound.")
+    parser.add_argument("names", nargs="*", help="SOUND_MAP ids to benchmark (default: the whole catalog)")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="decodes per candidate")
+    parser.add_argument("--codec", action="append", choices=sorted({fmt for fmt, _ in CANDIDATES}),
+                        help="only benchmark this codec (repeatable)")
+    parser.add_argument("--max-distance", type=float, default=sounds.MAX_SPECTRAL_DISTANCE_DB,
+                        help="log-spectral distance in dB a recommended encode may have")
+    parser.add_argument("--max-decode-load", type=float, default=MAX_DECODE_LOAD,
+                        help="decode_load (codec class x channels x seconds at 44.1 kHz) a recommended candidate may have")
+    args = parser.parse_args()
+
+    names = args.names or list(sounds.SOUND_MAP)
+    unknown = [n for n in names if n not in sounds.SOUND_MAP]
+    if unknown:
+        parser.error(f"unknown sound(s): {', '.join(unknown)}")
+    candidates = [c for c in CANDIDATES if not args.codec or c[0] in args.codec]
+
+    table = {}
+    print(f"{'sound':<11} {'rate':>6}  {'pick':<10} {'bytes':>8} {'samples/ms':>10} {'first ms':>8} {'peak KiB':>8}")
+    with tempfile.TemporaryDirectory() as td:
+        for name in names:
+            rate, channels, seconds, results = bench_sound(name, td, candidates, args.repeats)
+            pick = recommend(results, args.max_distance, args.max_decode_load)
+            table[name] = {
+                "rate": rate, "channels": channels, "seconds": round(seconds, 3),
+                "recommended": {"format": pick["format"], "setting": pick["setting"]},
+                "candidates": results,
+            }
+            label = pick["format"] + (f" {pick['setting']}" if pick["setting"] else "")
+            print(f"{name:<11} {rate:>6}  {label:<10} {pick['bytes']:>8} {pick['samples_per_ms']:>10.1f} "
+                  f"{pick['first_sample_ms']:>8.3f} {pick['peak_kib']:>8.1f}")
+
+    sounds.ensure_out_dir()
+    path = os.path.join(sounds.OUT_DIR, sounds.CODEC_TABLE)
+    report = {"host": host_info(), "sounds": table}
+    if os.path.exists(path) and args.names:
+        # a partial run updates its sounds and keeps the others' picks
+        with open(path, encoding="utf-8") as f:
+            report["sounds"] = {**json.load(f)["sounds"], **table}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    picks = [e["recommended"]["format"] for e in table.values()]
+    print(f"{len(table)} sounds -> {path} ("
+          + ", ".join(f"{fmt} {picks.count(fmt)}" for fmt in sorted(set(picks))) + ")")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
+from __future__ import annotations
+
 import re
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
-from google.auth.transport.requests import AuthorizedSession
-from google.oauth2 import service_account
+if TYPE_CHECKING:
+    from google.auth.transport.requests import AuthorizedSession
 
 # ================= CONFIGURATION =================
 PACKAGE_NAME = "com.slimepop.asmr"
@@ -23,6 +25,10 @@ LATENCY_TOLERANT = "PRODUCT_UPDATE_LATENCY_TOLERANCE_LATENCY_TOLERANT"
 
 
 def get_session() -> AuthorizedSession:
+    # google-auth is only needed to talk to the Play API, not to read the catalogs
+    from google.auth.transport.requests import AuthorizedSession
+    from google.oauth2 import service_account
+
     creds = service_account.Credentials.from_service_account_file(JSON_KEY_FILE, scopes=SCOPE)
     return AuthorizedSession(creds)
 
@@ -38,27 +44,32 @@ def micros_to_money(micros: int, currency_code: str) -> Dict:
     return {"currencyCode": currency_code, "units": str(units), "nanos": nanos}
 
 
+def load_catalog_entries(catalog: Path, kind: str) -> List[Tuple[str, str, bool]]:
+    """(id, name, isIAP) for every `kind("id", "name", ...)` line of a Kotlin catalog."""
+    entries: List[Tuple[str, str, bool]] = []
+    if not catalog.exists():
+        return entries
+
+    for line in catalog.read_text(encoding="utf-8").splitlines():
+        if f"{kind}(" not in line:
+            continue
+        match = re.search(kind + r'\("([^"]+)",\s*"([^"]+)"', line)
+        if not match:
+            continue
+        entries.append((match.group(1), match.group(2), "isIAP = true" in line))
+
+    return entries
+
+
 def load_premium_products_from_catalogs() -> List[Tuple[str, str, str]]:
     products: List[Tuple[str, str, str]] = []
 
-    if SKIN_CATALOG.exists():
-        for line in SKIN_CATALOG.read_text(encoding="utf-8").splitlines():
-            if "SlimeSkin(" not in line or "isIAP = true" not in line:
-                continue
-            match = re.search(r'SlimeSkin\("([^"]+)",\s*"([^"]+)"', line)
-            if not match:
-                continue
-            sku_id, name = match.group(1), match.group(2)
+    for sku_id, name, is_iap in load_catalog_entries(SKIN_CATALOG, "SlimeSkin"):
+        if is_iap:
             products.append((sku_id, f"{name} Skin", f"Unlock the premium {name} slime skin."))
 
-    if SOUND_CATALOG.exists():
-        for line in SOUND_CATALOG.read_text(encoding="utf-8").splitlines():
-            if "SlimeSound(" not in line or "isIAP = true" not in line:
-                continue
-            match = re.search(r'SlimeSound\("([^"]+)",\s*"([^"]+)"', line)
-            if not match:
-                continue
-            sku_id, name = match.group(1), match.group(2)
+    for sku_id, name, is_iap in load_catalog_entries(SOUND_CATALOG, "SlimeSound"):
+        if is_iap:
             products.append((sku_id, name, f"Unlock the premium {name} ASMR sound."))
 
     return products
@@ -0,0 +1,114 @@
+"""
+Catalog fingerprinting and duplicate report.
+
+Every SOUND_MAP entry is rendered once from sounds.DEDUP_SEED and reduced to:
+
+  digest      sha1 of the seeded render; equal digests are exact duplicates,
+              which the catalog build ships once (see sounds.catalog_aliases)
+  signature   mean and spread over time of the 1/3-octave band levels
+              relative to the sound's overall level, so loudness and render
+              rate do not matter and two renders of the same recipe with
+              different noise land next to each other
+
+Signatures are scaled so that Euclidean distance is an RMS difference in dB
+and indexed in a k-d tree; pairs closer than NEAR_DUPLICATE_DB are reported
+as near duplicates worth merging or re-voicing.
+
+Output:
+  exported_sounds/fingerprints.json  {id: {digest, rate, signature}, aliases, near_duplicates}
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+import sounds
+
+FINGERPRINTS = "fingerprints.json"   # written inside sounds.OUT_DIR
+FRAME = 2048                          # STFT frame at BASE_SR
+LEVEL_FLOOR_DB = -80.0                # band levels below the overall level are clamped here
+NEAR_DUPLICATE_DB = 2.0
+
+
+def signature(x, rate):
+    """
+    Band-level signature of a render: per 1/3-octave band, the mean and the
+    standard deviation over frames of its level relative to the total.
+    """
+    x = sounds.resample_loop(x, rate, sounds.BASE_SR)
+    if x.ndim > 1:
+        x = x.mean(axis=0)
+    hop = FRAME // 2
+    count = max(1, (len(x) - FRAME) // hop + 1)
+    idx = np.arange(FRAME)[None, :] + hop * np.arange(count)[:, None]
+    power = np.abs(np.fft.rfft(x[idx] * np.hanning(FRAME), axis=1)) ** 2
+    edges = sounds.band_edges(FRAME, sounds.BASE_SR)
+    bands = 10 * np.log10(np.add.reduceat(power, edges, axis=1)[:, :-1] + 1e-12)
+    total = 10 * np.log10(power.sum(axis=1).mean() + 1e-12)
+    bands = np.maximum(bands - total, LEVEL_FLOOR_DB)
+    return np.concatenate([bands.mean(axis=0), bands.std(axis=0)]).astype(np.float32)
+
+
+def fingerprint_catalog(names=None):
+    """
+    {id: (digest, rate, signature)} for SOUND_MAP entries, one seeded render each.
+    """
+    prints = {}
+    for name in names or sounds.SOUND_MAP:
+        x, rate = sounds.seeded_render(name)
+        prints[name] = (sounds.render_digest(x, rate), rate, signature(x, rate))
+    return prints
+
+
+def near_duplicates(signatures, max_distance=NEAR_DUPLICATE_DB):
+    """
+    [(a, b, distance in dB)] for every pair of {id: signature} closer than
+    max_distance, closest first.
+    """
+    from scipy.spatial import cKDTree
+    names = list(signatures)
+    points = np.array([signatures[n] for n in names], dtype=np.float64)
+    points /= np.sqrt(points.shape[1])   # Euclidean distance -> RMS dB
+    tree = cKDTree(points)
+    pairs = []
+    for i, j in tree.query_pairs(max_distance):
+        pairs.append((names[i], names[j], float(np.linalg.norm(points[i] - points[j]))))
+    return sorted(pairs, key=lambda p: p[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerprint the catalog and report exact and near duplicates.")
+    parser.add_argument("--max-distance", type=float, default=NEAR_DUPLICATE_DB,
+                        help="signature distance in dB below which two sounds are near duplicates")
+    args = parser.parse_args()
+
+    prints = fingerprint_catalog()
+    aliases = sounds.catalog_aliases({name: p[0] for name, p in prints.items()})
+    canonical = {name: p[2] for name, p in prints.items() if name not in aliases}
+    pairs = near_duplicates(canonical, args.max_distance)
+
+    def label(name):
+        return f"{name} ({sounds.sound_entry(name)[0].__name__})"
+
+    for name, target in aliases.items():
+        print(f"exact: {label(name)} == {label(target)}")
+    for a, b, dist in pairs:
+        print(f"near:  {label(a)} ~ {label(b)}  {dist:.2f} dB")
+
+    sounds.ensure_out_dir()
+    report = {
+        "sounds": {name: {"digest": digest, "rate": rate, "signature": [round(float(v), 2) for v in sig]}
+                   for name, (digest, rate, sig) in prints.items()},
+        "aliases": aliases,
+        "near_duplicates": [[a, b, round(dist, 2)] for a, b, dist in pairs],
+    }
+    with open(os.path.join(sounds.OUT_DIR, FINGERPRINTS), "w", encoding="utf-8") as f:
+        json.dump(report, f, separators=(",", ":"))
+    print(f"{len(prints)} sounds, {len(aliases)} exact and {len(pairs)} near duplicates -> "
+          f"{sounds.OUT_DIR}/{FINGERPRINTS}")
+
+
+if __name__ == "__main__":
+    main()
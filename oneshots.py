@@ -0,0 +1,81 @@
+"""
+Device-native one-shot bank.
+
+Most Android devices mix at 48 kHz, so a 44.1 or 32 kHz one-shot goes through
+the platform resampler on every tap. This writes each one-shot once per rate in
+DEVICE_RATES, next to the original in res/raw:
+
+  pop_<rate>.wav             pop.py's pop rendered natively at <rate>
+  bubble_pop_NN_<rate>.wav   the bubble_pop_NN.wav one-shots (no generator in
+                             this repo) polyphase-resampled to <rate>
+
+Every variant starts on its transient: samples before the first one above
+ONSET_DB are trimmed, so the onset sits at sample 0 at every rate. The app
+loads the variant matching AudioManager.PROPERTY_OUTPUT_SAMPLE_RATE and falls
+back to the unsuffixed file (SlimeAudioManager.nativeVariant).
+"""
+
+import argparse
+from math import gcd
+from pathlib import Path
+
+import numpy as np
+
+import pop
+import sounds
+
+RAW_DIR = Path("app/src/main/res/raw")
+DEVICE_RATES = [48000, 44100]
+ONSET_DB = -60.0   # level (dBFS) that counts as the start of the transient
+
+
+def trim_onset(x, onset_db=ONSET_DB):
+    """
+    x from its first sample at or above onset_db.
+    """
+    above = np.flatnonzero(np.abs(x) >= 10 ** (onset_db / 20))
+    return x[above[0]:] if len(above) else x[:0]
+
+
+def source_one_shots():
+    """
+    bubble_pop_NN.wav paths, without the rate variants this module writes.
+    """
+    return sorted(RAW_DIR.glob("bubble_pop_[0-9][0-9].wav"))
+
+
+def pop_variant(rate):
+    return trim_onset(np.asarray(pop.render_pop(rate), dtype=np.float32))
+
+
+def resampled_variant(path, rate):
+    from scipy.signal import resample_poly
+    import soundfile as sf
+    x, src_rate = sf.read(str(path), dtype="float32")
+    if x.ndim > 1:
+        x = x.mean(axis=1)
+    if src_rate != rate:
+        g = gcd(src_rate, rate)
+        x = resample_poly(x, rate // g, src_rate // g).astype(np.float32)
+    return trim_onset(x)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write device-native rate variants of the one-shots into res/raw.")
+    parser.add_argument("--rate", type=int, action="append", metavar="HZ",
+                        help=f"rate to write (repeatable; default {' '.join(map(str, DEVICE_RATES))})")
+    args = parser.parse_args()
+
+    RAW_DIR.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for rate in args.rate or DEVICE_RATES:
+        variants = [("pop", pop_variant(rate))]
+        variants += [(path.stem, resampled_variant(path, rate)) for path in source_one_shots()]
+        for name, x in variants:
+            sounds.write_wav(str(RAW_DIR / f"{name}_{rate}.wav"), x, rate)
+            written += 1
+    print(f"Wrote {written} one-shot variants to {RAW_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
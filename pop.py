@@ -8,9 +8,10 @@ Option 2 (snappy bubble pop):
 - Gentle saturation for punch without harshness
 
 Output:
-  pop.wav  (44.1 kHz, mono, 16-bit PCM)
+  pop.wav  (44.1 kHz by default, --rate to render at another rate; mono, 16-bit PCM)
 """
 
+import argparse
 import math
 import wave
 import struct
@@ -24,11 +25,11 @@ def clamp(x: float) -> float:
     return -1.0 if x < -1.0 else 1.0 if x > 1.0 else x
 
 
-def write_wav(path: Path, samples):
+def write_wav(path: Path, samples, rate: int = None):
     with wave.open(str(path), "wb") as w:
         w.setnchannels(1)
         w.setsampwidth(2)  # 16-bit PCM
-        w.setframerate(SAMPLE_RATE)
+        w.setframerate(rate or SAMPLE_RATE)
         frames = bytearray()
         for s in samples:
             frames += struct.pack("<h", int(clamp(s) * 32767))
@@ -97,7 +98,30 @@ def generate_pop_option2():
     return fade(samples, 0.01)
 
 
-if __name__ == "__main__":
-    pop = generate_pop_option2()
-    write_wav(OUTPUT_FILE, pop)
+def render_pop(rate: int = SAMPLE_RATE):
+    """
+    generate_pop_option2() rendered natively at `rate`; envelopes, fades and
+    oscillators all read SAMPLE_RATE at call time.
+    """
+    global SAMPLE_RATE
+    prev = SAMPLE_RATE
+    SAMPLE_RATE = rate
+    try:
+        return generate_pop_option2()
+    finally:
+        SAMPLE_RATE = prev
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the snappy bubble pop.")
+    parser.add_argument("--rate", type=int, default=SAMPLE_RATE, help="sample rate to render at, e.g. 48000")
+    args = parser.parse_args()
+
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    pop = render_pop(args.rate)
+    write_wav(OUTPUT_FILE, pop, args.rate)
     print(f"Generated {OUTPUT_FILE.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
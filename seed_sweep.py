@@ -0,0 +1,75 @@
+"""
+Seed sweep: pick the best draw of every random sound and lock it.
+
+Every SOUND_MAP entry that draws from np.random (sounds.sweep_candidates) is
+rendered from --seeds consecutive seeds and finished the way the export
+finishes it. The renders are scored together (sounds.variant_scores: seam
+jump, crest factor, loudness off the median draw) and the lowest score wins.
+Winning seeds are merged into exported_sounds/seeds.json; `sounds.py` then
+renders those sounds once, from their seed, and `--no-seeds` ignores them.
+
+The generators share the one global RNG, so the K renders of a sound cannot
+be batched in one call; they run across processes, and the scoring is one
+vectorized pass over the stacked renders. A seed picks one realization
+only at the shape it was scored on (a stereo export draws its extra channel
+phases from the same seed, a full-length one draws more), so every lock
+records its channels and full_length, and sounds.py applies only the locks
+matching the export; sweep with --stereo / --full-length for those exports.
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import sounds
+
+
+def sweep_sound(name, seeds, pool, channels=1, full_length=False):
+    """
+    (winning seed, {metric: its value}, all scores) over renders of name
+    from each of seeds.
+    """
+    k = len(seeds)
+    renders = list(pool.map(sounds.finished_render, [name] * k, seeds, [channels] * k, [full_length] * k))
+    scores = sounds.variant_scores(np.stack([x for x, _ in renders]))
+    best = int(np.argmin(scores["score"]))
+    return seeds[best], {metric: round(float(v[best]), 2) for metric, v in scores.items()}, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render several seeds per random sound and lock the best one.")
+    parser.add_argument("names", nargs="*", help="SOUND_MAP ids to sweep (default: every random sound)")
+    parser.add_argument("--seeds", type=int, default=sounds.SWEEP_SEEDS, help="seeds to try per sound")
+    parser.add_argument("--first-seed", type=int, default=0, help="first seed of the range")
+    parser.add_argument("--stereo", action="store_true", help="score the renders a --stereo export makes")
+    parser.add_argument("--full-length", action="store_true", help="score the renders a --full-length export makes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="render processes")
+    args = parser.parse_args()
+
+    unknown = [n for n in args.names if n not in sounds.SOUND_MAP]
+    if unknown:
+        parser.error(f"unknown sound(s): {', '.join(unknown)}")
+    aliases = sounds.catalog_aliases()
+    names = [n for n in sounds.sweep_candidates(args.names or None) if n not in aliases]
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    channels = 2 if args.stereo else 1
+
+    locked = {}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for name in names:
+            seed, best, scores = sweep_sound(name, seeds, pool, channels, args.full_length)
+            locked[name] = {"seed": seed, "channels": channels, "full_length": args.full_length, **best,
+                            "tried": len(seeds)}
+            print(f"{name} ({sounds.sound_entry(name)[0].__name__}): seed {seed}  score {best['score']:.2f} "
+                  f"(median {np.median(scores['score']):.2f}, worst {scores['score'].max():.2f})  "
+                  f"seam {best['seam_db']:.2f}  crest {best['crest_db']:.2f}  "
+                  f"loudness {best['loudness_dev_db']:.2f} dB")
+
+    sounds.write_seed_manifest(locked)
+    print(f"Locked {len(locked)} seeds in {sounds.OUT_DIR}/{sounds.SEED_MANIFEST}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+"Sounds like this one": a top-k neighbor table for the shop.
+
+Each catalog id is described by what SoundLibrary actually plays for it,
+soundpack_NNN, reduced to a small feature vector:
+
+  signature         fingerprints.signature (1/3-octave band levels, mean and
+                    spread over time, relative to the overall level)
+  centroid_hz       spectral centroid of the mean power spectrum
+  modulation_hz     strongest envelope modulation between MOD_MIN_HZ and
+                    MOD_MAX_HZ (waves, pulses, tremolo)
+  modulation_depth  envelope standard deviation over its mean
+  onsets_per_s      band-level rise peaks per second (taps, drips, clicks)
+
+slimepop2.py (and slimepop.py) hand over each soundpack while it is still in
+memory; features are cached in exported_sounds/similarity_features.json under
+the render's digest, so a build only analyses the soundpacks that changed.
+Distances use fixed units (FEATURE_UNITS) rather than statistics of the
+catalog, so editing one sound moves only the rows it enters or leaves.
+
+The table is written to exported_sounds/similar_sounds.json, only when a
+neighbor list changes, and sync_assets.py ships it to res/raw like the other
+assets; at runtime a recommendation is one map lookup (SoundSimilarity.kt).
+
+  python similarity.py [--k K]
+
+rebuilds the table from the cached features alone (after changing k or
+FEATURE_UNITS); it exits non-zero, leaving the table alone, when no
+soundpack has been analysed yet.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+import fingerprints
+import sounds
+import sync_assets
+
+FEATURES = "similarity_features.json"   # written inside sounds.OUT_DIR
+TABLE = "similar_sounds.json"           # written inside sounds.OUT_DIR, shipped by sync_assets.py
+TOP_K = 5
+HOP = 512                # envelope hop at BASE_SR (~86 frames/s)
+MOD_MIN_HZ = 0.1
+MOD_MAX_HZ = 20.0
+ONSET_RISE_DB = 6.0      # level rise over the median (mean of the most-rising quarter of the bands) of an onset
+
+# distance units: one unit of each is weighted like an RMS signature
+# difference of SIGNATURE_UNIT_DB
+SIGNATURE_UNIT_DB = 6.0
+FEATURE_UNITS = {
+    "centroid_hz": 1.0,        # octaves
+    "modulation_hz": 2.0,      # octaves, times the depth (capped at 1)
+    "modulation_depth": 0.5,
+    "onsets_per_s": 1.0,       # log2(1 + rate)
+}
+
+
+def analyse(x, rate):
+    """
+    {centroid_hz, modulation_hz, modulation_depth, onsets_per_s, signature}
+    of a render (mono or channels x samples).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    sig = fingerprints.signature(x, rate)
+    x = sounds.resample_loop(x, rate, sounds.BASE_SR)
+    if x.ndim > 1:
+        x = x.mean(axis=0)
+    # frames wrap around the loop point, so an event at the seam is seen once
+    frame = fingerprints.FRAME
+    count = max(1, -(-len(x) // HOP))
+    idx = (np.arange(frame)[None, :] + HOP * np.arange(count)[:, None]) % len(x)
+    power = np.abs(np.fft.rfft(x[idx] * np.hanning(frame), axis=1)) ** 2
+
+    freqs = np.fft.rfftfreq(frame, 1 / sounds.BASE_SR)
+    mean_power = power.mean(axis=0)
+    centroid = float(np.sum(freqs * mean_power) / (np.sum(mean_power) + 1e-20))
+
+    env = np.sqrt(power.sum(axis=1))
+    frame_rate = sounds.BASE_SR / HOP
+    depth = float(env.std() / (env.mean() + 1e-20))
+    mod = np.abs(np.fft.rfft((env - env.mean()) * np.hanning(count)))
+    mod_freqs = np.fft.rfftfreq(count, 1 / frame_rate)
+    band = (mod_freqs >= MOD_MIN_HZ) & (mod_freqs <= MOD_MAX_HZ)
+    modulation = float(mod_freqs[band][np.argmax(mod[band])]) if band.any() else 0.0
+
+    edges = sounds.band_edges(frame, sounds.BASE_SR)
+    levels = 10 * np.log10(np.add.reduceat(power, edges, axis=1)[:, :-1] + 1e-12)
+    levels = np.maximum(levels, levels.max() + fingerprints.LEVEL_FLOOR_DB)
+    rise = np.sort(np.maximum(levels - np.roll(levels, 1, axis=0), 0.0), axis=1)
+    flux = rise[:, -max(1, rise.shape[1] // 4):].mean(axis=1)   # loudest quarter of the bands
+    peaks = ((flux > np.roll(flux, 1)) & (flux >= np.roll(flux, -1))
+             & (flux > np.median(flux) + ONSET_RISE_DB))
+    onsets = float(np.count_nonzero(peaks) / (len(x) / sounds.BASE_SR))
+
+    return {"centroid_hz": round(centroid, 1), "modulation_hz": round(modulation, 3),
+            "modulation_depth": round(depth, 3), "onsets_per_s": round(onsets, 2),
+            "signature": [round(float(v), 2) for v in sig]}
+
+
+def sound_features(x, rate, cached=None):
+    """
+    Feature entry for a render, reusing `cached` (an earlier entry) when its
+    digest still matches.
+    """
+    digest = sounds.render_digest(x, rate)
+    if cached and cached.get("digest") == digest:
+        return cached
+    return {"digest": digest, "rate": rate, **analyse(x, rate)}
+
+
+def features_path():
+    return os.path.join(sounds.OUT_DIR, FEATURES)
+
+
+def load_features():
+    if not os.path.exists(features_path()):
+        return {}
+    with open(features_path(), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def soundpack_name(sound_id):
+    """
+    The soundpack SoundLibrary plays for a catalog id, or None.
+    """
+    n = sound_id.rpartition("_")[2]
+    return sync_assets.DYNAMIC_RAW_NAMES[0].format(n=int(n)) if n.isdigit() else None
+
+
+def catalog_features(features, ids):
+    """
+    {catalog id: feature entry of its soundpack}; ids whose soundpack has
+    not been analysed are left out.
+    """
+    names = {sound_id: soundpack_name(sound_id) for sound_id in ids}
+    return {sound_id: features[name] for sound_id, name in names.items() if name in features}
+
+
+def feature_matrix(entries):
+    """
+    Rows whose Euclidean distance is the weighted feature distance in units
+    of SIGNATURE_UNIT_DB. Modulation rate is scaled by depth, so the rate of
+    a flat envelope does not count.
+    """
+    rows = []
+    for e in entries:
+        sig = np.asarray(e["signature"]) / np.sqrt(len(e["signature"])) / SIGNATURE_UNIT_DB
+        depth = min(e["modulation_depth"], 1.0)
+        rows.append(np.concatenate([sig, [
+            np.log2(max(e["centroid_hz"], 20.0)) / FEATURE_UNITS["centroid_hz"],
+            depth * np.log2(max(e["modulation_hz"], MOD_MIN_HZ)) / FEATURE_UNITS["modulation_hz"],
+            e["modulation_depth"] / FEATURE_UNITS["modulation_depth"],
+            np.log2(1 + e["onsets_per_s"]) / FEATURE_UNITS["onsets_per_s"],
+        ]]))
+    return np.array(rows)
+
+
+def neighbor_table(chosen, k=TOP_K):
+    """
+    {id: [k nearest other ids, closest first]}; ties break by id.
+    """
+    from scipy.spatial import cKDTree
+    names = sorted(chosen)
+    if len(names) < 2:
+        return {name: [] for name in names}
+    points = feature_matrix([chosen[n] for n in names])
+    k = min(k, len(names) - 1)
+    _, idx = cKDTree(points).query(points, k=k + 1)
+    table = {}
+    for i, name in enumerate(names):
+        table[name] = [names[j] for j in idx[i] if j != i][:k]
+    return table
+
+
+def table_path():
+    return os.path.join(sounds.OUT_DIR, TABLE)
+
+
+def update_index(entries=None, k=TOP_K, ids=None):
+    """
+    Merges {soundpack name: feature entry} (sound_features of the renders a
+    generator just made) into the cache, rebuilds the neighbor table and
+    rewrites exported_sounds/similar_sounds.json when it changed. Exits
+    non-zero without touching the table when no catalog soundpack has
+    features. Returns the catalog ids whose neighbor list changed.
+    """
+    known = load_features()
+    entries = entries or {}
+    renewed = sum(known.get(name, {}).get("digest") != entry["digest"] for name, entry in entries.items())
+    features = {**known, **entries}
+    if entries:
+        sounds.ensure_out_dir()
+        with open(features_path(), "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(features.items())), f, separators=(",", ":"))
+
+    chosen = catalog_features(features, ids or sync_assets.catalog_ids())
+    if not chosen:
+        sys.exit(f"Similarity: no soundpack features in {features_path()}; "
+                 f"run slimepop2.py first ({table_path()} left as is)")
+    table = neighbor_table(chosen, k)
+    old = {}
+    if os.path.exists(table_path()):
+        with open(table_path(), encoding="utf-8") as f:
+            old = json.load(f)
+    old_table = old.get("neighbors", {})
+    changed = sorted(n for n in set(table) | set(old_table) if table.get(n) != old_table.get(n))
+    if changed or old.get("k") != k:
+        with open(table_path(), "w", encoding="utf-8") as f:
+            f.write(json.dumps({"k": k, "neighbors": table}, separators=(",", ":")) + "\n")
+    print(f"Similarity: {len(chosen)} soundpacks, {renewed} with new audio, "
+          f"{len(changed)} neighbor lists changed -> {table_path()} (ship with sync_assets.py)")
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the top-k 'sounds like this one' table.")
+    parser.add_argument("--k", type=int, default=TOP_K, help="neighbors per sound")
+    args = parser.parse_args()
+
+    changed = update_index(k=args.k)
+    with open(table_path(), encoding="utf-8") as f:
+        table = json.load(f)["neighbors"]
+    for name in changed:
+        if name in table:
+            print(f"{name}: {', '.join(table[name])}")
+
+
+if __name__ == "__main__":
+    main()
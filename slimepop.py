@@ -1,4 +1,5 @@
 import os
+import argparse
 import math
 import random
 import wave
@@ -6,8 +7,12 @@ import struct
 from pathlib import Path
 
 SR = 44100  # sample rate
-OUT_DIR = Path("C:/Users/khann/AndroidStudioProjects/SlimePop/app/src/main/res/raw")
-OUT_DIR.mkdir(parents=True, exist_ok=True)
+OUT_DIR = Path("app/src/main/res/raw")
+
+# Periodic mode (--periodic): filters start from the state the loop ends in,
+# sines and LFOs make whole cycles per loop and chime tails wrap around to the
+# start, so a soundpack loops gaplessly on a single player.
+PERIODIC = False
 
 def write_wav(path: Path, samples, sr=SR):
     # samples: float [-1, 1]
@@ -34,6 +39,22 @@ def env_perc(n, attack=0.005, decay=0.12):
             env[i] = math.exp(-4.0 * t)
     return env
 
+def settled_state(x, step):
+    # filter state y = step(y, s) at the end of x, which is where a periodic
+    # loop's filter starts; 0.0 outside periodic mode
+    y = 0.0
+    if PERIODIC:
+        for s in x:
+            y = step(y, s)
+    return y
+
+def locked(freq, n):
+    # in periodic mode, the nearest frequency with a whole number of cycles
+    # (at least one) in n samples
+    if not PERIODIC:
+        return freq
+    return max(1, round(freq * n / SR)) * SR / n
+
 def lowpass_onepole(x, cutoff_hz):
     # one-pole lowpass
     if cutoff_hz <= 0:
@@ -41,7 +62,7 @@ def lowpass_onepole(x, cutoff_hz):
     rc = 1.0 / (2 * math.pi * cutoff_hz)
     dt = 1.0 / SR
     alpha = dt / (rc + dt)
-    y = 0.0
+    y = settled_state(x, lambda y, s: y + alpha * (s - y))
     out = []
     for s in x:
         y = y + alpha * (s - y)
@@ -90,7 +111,7 @@ def make_loop_base(kind, seconds=12):
     if kind == "brown":
         # integrated noise (brown-ish)
         x = band_limited_noise(n)
-        y = 0.0
+        y = settled_state(x, lambda y, s: 0.98 * y + 0.02 * s)
         out = []
         for s in x:
             y = 0.98 * y + 0.02 * s
@@ -101,10 +122,11 @@ def make_loop_base(kind, seconds=12):
         x = band_limited_noise(n)
         x = lowpass_onepole(x, 350)
         # slow amplitude flutter
+        flutter_hz = locked(0.08, n)
         out = []
         for i, s in enumerate(x):
             t = i / SR
-            amp = 0.5 + 0.5 * math.sin(2*math.pi*0.08*t + 1.1)  # 0.08 Hz
+            amp = 0.5 + 0.5 * math.sin(2*math.pi*flutter_hz*t + 1.1)  # 0.08 Hz
             out.append(s * (0.05 + 0.12 * amp))
         return out
 
@@ -114,6 +136,7 @@ def make_loop_base(kind, seconds=12):
         p1 = p2 = 0.0
         f1 = random.choice([110, 130, 146, 164])
         f2 = f1 * 1.5
+        f1, f2, lfo_hz = locked(f1, n), locked(f2, n), locked(0.05, n)
         noise = lowpass_onepole(band_limited_noise(n), 900)
         for i in range(n):
             p1 += 2*math.pi*f1/SR
@@ -121,7 +144,7 @@ def make_loop_base(kind, seconds=12):
             s = 0.06*math.sin(p1) + 0.04*math.sin(p2) + 0.02*noise[i]
             # gentle LFO
             t = i / SR
-            lfo = 0.85 + 0.15*math.sin(2*math.pi*0.05*t)
+            lfo = 0.85 + 0.15*math.sin(2*math.pi*lfo_hz*t)
             out.append(s * lfo)
         return out
 
@@ -137,7 +160,9 @@ def make_loop_base(kind, seconds=12):
             for j in range(dur):
                 i = ht + j
                 if i >= n:
-                    break
+                    if not PERIODIC:
+                        break
+                    i %= n
                 phase += 2*math.pi*f/SR
                 s = math.sin(phase) + 0.35*math.sin(2*phase) + 0.20*math.sin(3*phase)
                 out[i] += 0.06 * s * env[j]
@@ -159,14 +184,31 @@ def make_50_soundpacks():
     ]
     # Expand to 50
     kinds = (kinds * 10)[:50]
+    try:
+        import similarity   # needs numpy/scipy; the soundpacks do not
+    except ImportError:
+        similarity = None
+    known, features = (similarity.load_features(), {}) if similarity else ({}, {})
 
     for idx in range(1, 51):
         kind = kinds[idx-1]
         wav = make_loop_base(kind, seconds=12)
         name = f"soundpack_{idx:03d}.wav"
         write_wav(OUT_DIR / name, wav)
+        if similarity:
+            features[name[:-4]] = similarity.sound_features(wav, SR, known.get(name[:-4]))
+    if similarity:
+        similarity.update_index(features)
+    else:
+        print("numpy/scipy not available: similar_sounds.json not updated")
 
 def main():
+    global PERIODIC
+    parser = argparse.ArgumentParser(description="Generate the noise-based soundpacks and pop into res/raw.")
+    parser.add_argument("--periodic", action="store_true",
+                        help="render soundpacks as gapless loops (wrapped filters, tones and chime tails)")
+    PERIODIC = parser.parse_args().periodic
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
     random.seed(7)
     make_pop_wav()
     make_50_soundpacks()
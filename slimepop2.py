@@ -1,3 +1,4 @@
+import argparse
 import math
 import random
 import wave
@@ -6,18 +7,28 @@ from pathlib import Path
 
 SR = 44100
 OUT_DIR = Path("app/src/main/res/raw")
-OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+PREVIEW_START = 1.0    # seconds; skips the texture's own fade-in
+PREVIEW_SECONDS = 4.0
+PREVIEW_FADE = 0.25
+PREVIEW_RATE = SR // 2
+PREVIEW_FORMAT = "ogg"   # encoded at sounds.PREVIEW_SETTINGS
+
+# Periodic mode (--periodic): events that run past the end wrap around to the
+# start, continuous tones and LFOs are moved to whole cycles per loop, and the
+# end fades are dropped, so a soundpack loops gaplessly on a single player.
+PERIODIC = False
 
 # ---------- helpers ----------
 
 def clamp(x):
     return -1.0 if x < -1.0 else 1.0 if x > 1.0 else x
 
-def write_wav(path, samples):
+def write_wav(path, samples, sr=SR):
     with wave.open(str(path), "wb") as w:
         w.setnchannels(1)
         w.setsampwidth(2)
-        w.setframerate(SR)
+        w.setframerate(sr)
         frames = bytearray()
         for s in samples:
             frames += struct.pack("<h", int(clamp(s) * 32767))
@@ -31,6 +42,10 @@ def fade(x, secs=0.1):
         x[n - 1 - i] *= i / f
     return x
 
+def loop_fade(x, secs):
+    # texture end fades; a periodic loop has no ends to fade
+    return x if PERIODIC else fade(x, secs)
+
 def env_perc(n, a=0.002, d=0.4):
     A = max(1, int(a * SR))
     D = max(1, int(d * SR))
@@ -51,6 +66,37 @@ def sine(freq, n, amp=1.0):
         out.append(math.sin(ph) * amp)
     return out
 
+def locked(freq, n):
+    # in periodic mode, the nearest frequency with a whole number of cycles
+    # (at least one) in n samples
+    if not PERIODIC:
+        return freq
+    return max(1, round(freq * n / SR)) * SR / n
+
+def add_event(out, t0, samples):
+    # mix samples in at t0; the part past the end wraps around in periodic
+    # mode and is dropped otherwise
+    n = len(out)
+    for j, s in enumerate(samples):
+        i = t0 + j
+        if i >= n:
+            if not PERIODIC:
+                break
+            i %= n
+        out[i] += s
+
+def write_preview(path, x):
+    # shop audition clip: a faded slice of the rendered texture, resampled
+    # to PREVIEW_RATE through resample_poly's anti-alias filter (the textures
+    # sit well below 11 kHz) and encoded like sounds.py's export_preview
+    import numpy as np
+    from scipy.signal import resample_poly
+    import sounds
+    start = int(PREVIEW_START * SR)
+    clip = fade(x[start:start + int(PREVIEW_SECONDS * SR)], PREVIEW_FADE)
+    clip = resample_poly(np.asarray(clip), PREVIEW_RATE, SR).astype(np.float32)
+    sounds.encode_audio(clip, str(path), PREVIEW_FORMAT, sounds.PREVIEW_SETTINGS[PREVIEW_FORMAT], PREVIEW_RATE)
+
 # ---------- textures (NO NOISE) ----------
 
 def rain_taps(seconds=12):
@@ -64,24 +110,22 @@ def rain_taps(seconds=12):
         env = env_perc(dur, 0.001, 0.08)
         f = random.uniform(1800, 4200)
         tone = sine(f, dur, 0.18)
-        for j in range(dur):
-            i = t0 + j
-            if i < n:
-                out[i] += tone[j] * env[j]
+        add_event(out, t0, [tone[j] * env[j] for j in range(dur)])
 
-    return fade(out, 0.15)
+    return loop_fade(out, 0.15)
 
 def ocean_waves(seconds=12):
     n = int(seconds * SR)
     out = [0.0]*n
-    base = random.choice([90, 110, 130])
+    base = locked(random.choice([90, 110, 130]), n)
+    swell_hz = locked(0.07, n)
 
     for i in range(n):
         t = i / SR
-        swell = 0.5 + 0.5 * math.sin(2*math.pi*0.07*t)
+        swell = 0.5 + 0.5 * math.sin(2*math.pi*swell_hz*t)
         out[i] = 0.25 * math.sin(2*math.pi*base*t) * swell
 
-    return fade(out, 0.2)
+    return loop_fade(out, 0.2)
 
 def singing_bowl(seconds=12):
     n = int(seconds * SR)
@@ -94,17 +138,16 @@ def singing_bowl(seconds=12):
         dur = int(3.5 * SR)
         env = env_perc(dur, 0.003, 2.8)
 
-        for j in range(dur):
-            i = t0 + j
-            if i < n:
-                s = (
-                    0.6*math.sin(2*math.pi*f0*j/SR) +
-                    0.3*math.sin(2*math.pi*f0*2*j/SR) +
-                    0.1*math.sin(2*math.pi*f0*3*j/SR)
-                )
-                out[i] += s * env[j] * 0.18
+        add_event(out, t0, [
+            (
+                0.6*math.sin(2*math.pi*f0*j/SR) +
+                0.3*math.sin(2*math.pi*f0*2*j/SR) +
+                0.1*math.sin(2*math.pi*f0*3*j/SR)
+            ) * env[j] * 0.18
+            for j in range(dur)
+        ])
 
-    return fade(out, 0.25)
+    return loop_fade(out, 0.25)
 
 def crystal_chimes(seconds=12):
     n = int(seconds * SR)
@@ -118,12 +161,9 @@ def crystal_chimes(seconds=12):
         f = random.choice([523.25, 659.25, 783.99])
 
         tone = sine(f, dur, 0.25)
-        for j in range(dur):
-            i = t0 + j
-            if i < n:
-                out[i] += tone[j] * env[j]
+        add_event(out, t0, [tone[j] * env[j] for j in range(dur)])
 
-    return fade(out, 0.2)
+    return loop_fade(out, 0.2)
 
 def soft_drips(seconds=12):
     n = int(seconds * SR)
@@ -137,27 +177,25 @@ def soft_drips(seconds=12):
         f = random.choice([320, 420, 520])
 
         tone = sine(f, dur, 0.22)
-        for j in range(dur):
-            i = t0 + j
-            if i < n:
-                out[i] += tone[j] * env[j]
+        add_event(out, t0, [tone[j] * env[j] for j in range(dur)])
 
-    return fade(out, 0.2)
+    return loop_fade(out, 0.2)
 
 def harmonic_pad(seconds=12):
     n = int(seconds * SR)
     out = [0.0]*n
     f = random.choice([110, 130.81, 146.83])
+    f1, f2, lfo_hz = locked(f, n), locked(f*1.5, n), locked(0.04, n)
 
     for i in range(n):
         t = i / SR
-        lfo = 0.7 + 0.3 * math.sin(2*math.pi*0.04*t)
+        lfo = 0.7 + 0.3 * math.sin(2*math.pi*lfo_hz*t)
         out[i] = lfo * (
-            0.25*math.sin(2*math.pi*f*t) +
-            0.15*math.sin(2*math.pi*f*1.5*t)
+            0.25*math.sin(2*math.pi*f1*t) +
+            0.15*math.sin(2*math.pi*f2*t)
         )
 
-    return fade(out, 0.25)
+    return loop_fade(out, 0.25)
 
 # ---------- pop ----------
 
@@ -178,6 +216,13 @@ def pop_sound():
 # ---------- build ----------
 
 def build():
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        import similarity   # needs numpy/scipy; the soundpacks do not
+    except ImportError:
+        similarity = None
+    known, features = (similarity.load_features(), {}) if similarity else ({}, {})
+
     make = []
     make += [rain_taps]*10
     make += [ocean_waves]*8
@@ -191,10 +236,28 @@ def build():
     for i in range(1, 51):
         wav = make[i-1](seconds=random.choice([10,12,14]))
         write_wav(OUT_DIR / f"soundpack_{i:03d}.wav", wav)
+        write_preview(OUT_DIR / f"soundpack_{i:03d}_preview.{PREVIEW_FORMAT}", wav)
+        # an earlier build's WAV preview would clash with it as a resource
+        (OUT_DIR / f"soundpack_{i:03d}_preview.wav").unlink(missing_ok=True)
+        if similarity:
+            name = f"soundpack_{i:03d}"
+            features[name] = similarity.sound_features(wav, SR, known.get(name))
 
     write_wav(OUT_DIR / "pop.wav", pop_sound())
-
-if __name__ == "__main__":
+    if similarity:
+        similarity.update_index(features)
+    else:
+        print("numpy/scipy not available: similar_sounds.json not updated")
+
+def main():
+    global PERIODIC
+    parser = argparse.ArgumentParser(description="Generate the no-noise soundpack library and pop into res/raw.")
+    parser.add_argument("--periodic", action="store_true",
+                        help="wrap events around the loop point and drop the end fades (gapless single-player loops)")
+    PERIODIC = parser.parse_args().periodic
     random.seed(2026)
     build()
     print("Generated NO-NOISE ASMR library")
+
+if __name__ == "__main__":
+    main()
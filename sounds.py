@@ -1,27 +1,226 @@
 import os
+import argparse
+import shutil
 import subprocess
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from math import gcd
+import hashlib
+import inspect
+import json
+import struct
+import sys
 import numpy as np
-import soundfile as sf
-from scipy.signal import butter, lfilter
 
-SR = 44100
-DURATION = 6.0          # seconds
+# scipy and soundfile are imported where they are used, so importing this
+# module (for SOUND_MAP, a single generator, or a worker process) stays cheap
+# and has no side effects.
+
+BASE_SR = 44100
+SR = BASE_SR            # current render rate; see render_rate()
+CHANNELS = 1            # current render channel count; see render_channels()
+LOOP_TRACE = None       # partials and event grids recorded while trace_loop() runs
+NOISE_BANK = None       # batched noise beds handed out while noise_bank() is active
+NOISE_BATCH_ROWS = 16   # noise beds synthesized per batched irfft
+RENDER_RATES = [11025, 16000, 22050, 32000, BASE_SR]  # candidates for "auto", lowest first
+AUTO_RATE_FLOOR_DB = -60.0   # energy allowed above 0.45 * rate for "auto"
+DURATION = 6.0          # seconds; longest loop, see loop_duration() for the per-sound length
+MIN_LOOP_SECONDS = 1.0  # shortest loop the length search may pick
+TRACE_RATE = 4000        # rate trace_loop() runs generators at; only event steps and partials are kept
+PARTIAL_TOLERANCE_CENTS = 5.0   # extra pitch drift a partial may take when a loop is shortened
+GATE_KERNEL_FLOOR_DB = -80.0    # sparse_gate() kernels end where the lowpass response stays below this
 FADE_MS = 40            # boundary crossfade in milliseconds (20–80ms is typical)
 MP3_BITRATE = "192k"    # "128k", "192k", "256k", etc.
+MP3_VBR_QUALITY = "2"   # LAME -V level of the default MP3 export (ffmpeg -q:a)
+OGG_QUALITY = "5"
+OPUS_BITRATE = "64k"
+
+# Shop previews: a short faded clip of every sound, encoded next to the full asset
+PREVIEW_SECONDS = 4.0
+PREVIEW_FADE_MS = 250
+PREVIEW_SETTINGS = {"mp3": "64k", "ogg": "1", "opus": "32k", "wav": None}
+
+# Encoder per format: "soundfile" encodes in-process from the float32 buffer,
+# "ffmpeg" shells out. soundfile falls back to ffmpeg when the local libsndfile
+# lacks the codec (or, for Opus, the sample rate).
+ENCODER_BACKENDS = {"mp3": "soundfile", "ogg": "soundfile", "opus": "soundfile"}
+
+# Bitrate search (--optimize): candidates are tried smallest-first per format
+MP3_BITRATE_LADDER = ["48k", "64k", "96k", "128k", "160k", None]   # None: the default VBR export
+OGG_QUALITY_LADDER = ["0", "1", "2", "3", "4", OGG_QUALITY]
+MAX_SPECTRAL_DISTANCE_DB = 0.75  # log-spectral distance allowed vs the source
+MAX_DISTANCE_OVER_TOP_DB = 0.25  # ... and over what the ladder's top rung scores
 
 OUT_DIR = "exported_sounds"
-os.makedirs(OUT_DIR, exist_ok=True)
+LOOP_MANIFEST = "loop_points.json"   # written inside OUT_DIR
+CODEC_TABLE = "codec_bench.json"     # per-sound format picks, written inside OUT_DIR by codec_bench.py
+PEAK_LEVELS = [1024, 256, 64]        # min/max buckets per zoom level in <name>.peaks, finest first
 
 # ----------------------------
 # DSP utilities
 # ----------------------------
 
-def normalize(x, peak=0.95):
-    m = np.max(np.abs(x)) + 1e-12
-    return (x / m) * peak
+@contextmanager
+def render_rate(rate):
+    """
+    Temporarily switch the module-wide sample rate. Every generator and filter
+    reads SR at call time, so a sound renders natively at `rate` inside this block.
+    """
+    global SR
+    prev = SR
+    SR = rate
+    try:
+        yield rate
+    finally:
+        SR = prev
+
+@contextmanager
+def render_channels(channels):
+    """
+    Temporarily switch the channel count. seamless_noise() then returns
+    (channels, samples) arrays whose channels share one magnitude spectrum
+    with independent phases; filters and loop finishing work along the last
+    axis, so a generator renders every channel in the same vectorized calls.
+    """
+    global CHANNELS
+    prev = CHANNELS
+    CHANNELS = channels
+    try:
+        yield channels
+    finally:
+        CHANNELS = prev
+
+@contextmanager
+def render_duration(seconds):
+    """
+    Temporarily switch the loop length. Generators size their buffers, partials
+    and event grids from DURATION at call time.
+    """
+    global DURATION
+    prev = DURATION
+    DURATION = seconds
+    try:
+        yield seconds
+    finally:
+        DURATION = prev
+
+def loop_samples(duration=None):
+    """
+    Samples in `duration` seconds (the loop length by default) at the current rate.
+    """
+    return int(round(SR * (DURATION if duration is None else duration)))
+
+def shape(n):
+    """
+    Buffer shape for n samples at the current channel count.
+    """
+    return (CHANNELS, n) if CHANNELS > 1 else (n,)
+
+def event_onsets(n, step_s):
+    """
+    Start samples of a regular event grid, one event every step_s seconds.
+    """
+    if LOOP_TRACE is not None:
+        LOOP_TRACE["grids"].append(step_s)
+    return range(0, n, int(SR * step_s))
+
+def gate_events(n, rate, process="bernoulli"):
+    """
+    Sorted event positions of a random gate over n periodic samples, `rate`
+    events per sample. "bernoulli" fires every sample independently (what
+    rand(n) > 1 - rate gives), drawn directly as geometric gaps; "poisson"
+    draws the count, then uniform positions.
+    """
+    if process == "poisson":
+        return np.sort(np.random.randint(0, n, np.random.poisson(rate * n)))
+    if process != "bernoulli":
+        raise ValueError(f"unknown gate process {process!r}")
+    expected = rate * n
+    size = int(expected + 6 * np.sqrt(expected)) + 16
+    pos = np.cumsum(np.random.geometric(rate, size)) - 1
+    while pos[-1] < n:
+        pos = np.concatenate([pos, pos[-1] + np.cumsum(np.random.geometric(rate, size))])
+    return pos[pos < n]
+
+@lru_cache(maxsize=None)
+def gate_kernel(cutoff_hz, sr):
+    """
+    Impulse response of lowpass(cutoff_hz) at sr, cut where it stays below
+    GATE_KERNEL_FLOOR_DB of its peak. Read-only.
+    """
+    from scipy.signal import butter, lfilter
+    b, a = butter(4, cutoff_hz / (sr / 2), btype="low")
+    impulse = np.zeros(sr)
+    impulse[0] = 1.0
+    h = lfilter(b, a, impulse)
+    floor = np.abs(h).max() * 10 ** (GATE_KERNEL_FLOOR_DB / 20)
+    h = h[:np.flatnonzero(np.abs(h) > floor)[-1] + 1].astype(np.float32)
+    h.setflags(write=False)
+    return h
+
+def place_kernel(n, positions, kernel):
+    """
+    n-sample periodic buffer holding kernel at every position; the part
+    that runs past the end wraps around to the start.
+    """
+    if len(kernel) > n:
+        kernel = np.pad(kernel, (0, -len(kernel) % n)).reshape(-1, n).sum(axis=0)
+    k = len(kernel)
+    out = np.zeros(n, dtype=np.float32)
+    for i in positions:
+        end = i + k
+        if end <= n:
+            out[i:end] += kernel
+        else:
+            out[i:] += kernel[:n - i]
+            out[:end - n] += kernel[n - i:]
+    return out
+
+def sparse_gate(rate, cutoff_hz, n=None, process="bernoulli"):
+    """
+    Smoothed random gate: a train of unit impulses at `rate` events per
+    sample through lowpass(cutoff_hz), rendered by placing gate_kernel() at
+    each of gate_events() around the periodic buffer instead of filtering a
+    full-length impulse array.
+    """
+    n = loop_samples() if n is None else n
+    return place_kernel(n, gate_events(n, rate, process), gate_kernel(cutoff_hz, SR))
+
+POOL = threading.local()   # per-thread scratch buffers, see pooled()
+
+def pooled(slot, shape, dtype):
+    """
+    Scratch array for `slot`, carved out of one flat buffer per (slot, dtype)
+    that grows to the largest request and is reused across sounds. Contents
+    are undefined and only valid until the next pooled() call for that slot.
+    """
+    buffers = POOL.__dict__.setdefault("buffers", {})
+    dtype = np.dtype(dtype)
+    size = int(np.prod(shape))
+    buf = buffers.get((slot, dtype))
+    if buf is None or buf.size < size:
+        buf = buffers[(slot, dtype)] = np.empty(size, dtype=dtype)
+    return buf[:size].reshape(shape)
+
+def normalize(x, peak=0.95, out=None):
+    """
+    Scales x to `peak`, into `out` when given (may be x itself).
+    """
+    m = max(x.max(), -x.min()) + 1e-12
+    if out is None:
+        return (x / m) * peak
+    np.divide(x, m, out=out)
+    return np.multiply(out, peak, out=out)
 
 def butter_filter(x, cutoff_hz, btype):
+    if isinstance(x, Node):
+        return Node(("filter", x, cutoff_hz, btype))
+    if LOOP_TRACE is not None:
+        return x   # a trace keeps no samples (and TRACE_RATE is below most cutoffs)
+    from scipy.signal import butter, lfilter
     b, a = butter(4, cutoff_hz / (SR / 2), btype=btype)
     return lfilter(b, a, x)
 
@@ -31,73 +230,597 @@ def lowpass(x, cutoff_hz):
 def highpass(x, cutoff_hz):
     return butter_filter(x, cutoff_hz, "high")
 
-def cycles_locked_sine(freq_hz, amp=1.0, duration=DURATION):
+def cycles_locked_sine(freq_hz, amp=1.0, duration=None):
     """
     Adjust frequency so freq * duration is an integer number of cycles.
     Ensures sample-accurate periodic boundary for the sine.
+    Loop-length sines (no duration) are partials of the loop; see trace_loop().
     """
+    if duration is None:
+        duration = DURATION
+        if LOOP_TRACE is not None:
+            LOOP_TRACE["partials"].append(freq_hz)
     n_cycles = max(1, int(round(freq_hz * duration)))
     f_adj = n_cycles / duration
-    n = int(SR * duration)
+    n = loop_samples(duration)
     t = np.arange(n) / SR
     return amp * np.sin(2 * np.pi * f_adj * t)
 
-def seamless_noise(duration=DURATION):
+def seamless_noise(duration=None):
     """
     Generate seamless (circular) noise by creating a random spectrum and IFFT.
     The resulting time series is periodic over the buffer length.
+    Scaled by SR / BASE_SR so the noise density (and therefore the balance
+    against sines in a mix) does not depend on the render rate.
+    With CHANNELS > 1 every channel gets its own phases over the same
+    magnitudes: decorrelated, equally coloured, one batched irfft.
     """
-    n = int(SR * duration)
+    n = loop_samples(duration)
+    if duration is None:
+        if LOOP_TRACE is not None:
+            LOOP_TRACE["beds"] += 1
+        if NOISE_BANK is not None:
+            bed = bank_bed(n)
+            if bed is not None:
+                return bed
     # rfft size n -> n//2 + 1 bins
     mag = np.random.rand(n // 2 + 1)
-    phase = np.random.rand(n // 2 + 1) * 2 * np.pi
+    phase = np.random.rand(*shape(n // 2 + 1)) * 2 * np.pi
     # DC and Nyquist should be real for perfect symmetry
-    phase[0] = 0.0
+    phase[..., 0] = 0.0
     if n % 2 == 0:
-        phase[-1] = 0.0
+        phase[..., -1] = 0.0
     spectrum = mag * np.exp(1j * phase)
-    x = np.fft.irfft(spectrum, n=n).astype(np.float32)
+    x = np.fft.irfft(spectrum, n=n, axis=-1) * (SR / BASE_SR)
+    return x.astype(np.float32)
+
+def noise_beds(rng, k, n, channels=1):
+    """
+    k seamless_noise() beds of n samples as one (k, [channels,] n) array: the
+    magnitudes and phases are drawn from rng as one matrix and go through a
+    single irfft along the last axis. Synthesis stays in single precision,
+    which is all a float32 bed needs and halves the memory traffic.
+    """
+    m = n // 2 + 1
+    mag = rng.random((k, 1, m) if channels > 1 else (k, m), dtype=np.float32)
+    phase = rng.random((k, channels, m) if channels > 1 else (k, m), dtype=np.float32)
+    return beds_from_draws(mag, phase, n)
+
+def seeded_beds(seeds, n, channels=1):
+    """
+    noise_beds() rows drawn from default_rng(seed) per seed, through one
+    irfft: row i is the bed noise(seeds[i]) renders on its own.
+    """
+    m = n // 2 + 1
+    mags, phases = [], []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        mags.append(rng.random((1, 1, m) if channels > 1 else (1, m), dtype=np.float32))
+        phases.append(rng.random((1, channels, m) if channels > 1 else (1, m), dtype=np.float32))
+    return beds_from_draws(np.concatenate(mags), np.concatenate(phases), n)
+
+def beds_from_draws(mag, phase, n):
+    phase *= np.float32(2 * np.pi)
+    phase[..., 0] = 0.0
+    if n % 2 == 0:
+        phase[..., -1] = 0.0
+    spectrum = np.empty(phase.shape, dtype=np.complex64)
+    np.cos(phase, out=spectrum.real)
+    np.sin(phase, out=spectrum.imag)
+    spectrum *= mag
+    x = np.fft.irfft(spectrum, n=n, axis=-1)
+    x *= np.float32(SR / BASE_SR)
     return x
 
-def equal_power_crossfade_loop(x, fade_ms=FADE_MS):
+@contextmanager
+def noise_bank(plan, seed=0, rows=NOISE_BATCH_ROWS, seeded=None):
     """
-    Enforce seamless boundary by blending the last fade segment into the first fade segment.
-    This removes clicks if there’s any residual mismatch.
+    Batch mode for noise beds. plan is {(rate, n, channels): number of beds}
+    (see catalog_noise_plan). Inside the block every full-length
+    seamless_noise() call of a planned shape takes the next row of a batch
+    made by noise_beds() from one generator seeded with `seed`, `rows` beds
+    per irfft; other calls synthesize on their own as usual.
+    seeded is {(rate, n, channels): [seeds]} of graph noise nodes (see
+    catalog_seed_plan); those are batched the same way by seeded_beds(),
+    so a noise(seed) node gets the same samples as outside the bank.
     """
-    n = len(x)
-    fade = int(SR * (fade_ms / 1000.0))
-    fade = max(8, min(fade, n // 4))
+    global NOISE_BANK
+    prev = NOISE_BANK
+    NOISE_BANK = {"rng": np.random.default_rng(seed), "remaining": dict(plan), "rows": rows, "ready": {},
+                  "seeded": {key: list(seeds) for key, seeds in (seeded or {}).items()}}
+    try:
+        yield
+    finally:
+        NOISE_BANK = prev
 
-    head = x[:fade].copy()
-    tail = x[-fade:].copy()
+def bank_bed(n):
+    """
+    Next batched bed of n samples at the current rate and channel count, or
+    None when the plan has no more of that shape.
+    """
+    key = (SR, n, CHANNELS)
+    ready = NOISE_BANK["ready"].get(key)
+    if not ready:
+        left = NOISE_BANK["remaining"].get(key, 0)
+        if left == 0:
+            return None
+        k = min(left, NOISE_BANK["rows"])
+        NOISE_BANK["remaining"][key] = left - k
+        ready = NOISE_BANK["ready"][key] = list(noise_beds(NOISE_BANK["rng"], k, n, CHANNELS))
+    return ready.pop(0)
+
+def bank_seeded_bed(seed, n):
+    """
+    Batched bed of noise(seed) at n samples, the current rate and channel
+    count, or None when the plan does not list that seed for the shape.
+    """
+    key = (SR, n, CHANNELS)
+    ready = NOISE_BANK["ready"]
+    if (seed,) + key not in ready:
+        pending = NOISE_BANK["seeded"].get(key, [])
+        if seed not in pending:
+            return None
+        pending.remove(seed)
+        batch = [seed] + pending[:NOISE_BANK["rows"] - 1]
+        del pending[:NOISE_BANK["rows"] - 1]
+        for s, bed in zip(batch, seeded_beds(batch, n, CHANNELS)):
+            ready[(s,) + key] = bed
+    return ready.pop((seed,) + key)
+
+def resample_loop(x, src_sr, dst_sr, pad=256):
+    """
+    Polyphase resampling of a periodic buffer. The input is wrapped on both
+    sides before filtering so the result is still seamless at the loop point.
+    """
+    from scipy.signal import resample_poly
+    if src_sr == dst_sr:
+        return x
+    g = gcd(src_sr, dst_sr)
+    up, down = dst_sr // g, src_sr // g
+    k = -(-pad // down)          # whole output samples of padding per side
+    pad_in = k * down
+    n = x.shape[-1]
+    if pad_in > n:
+        raise ValueError("loop too short to resample with wrap-around padding")
+    wrapped = np.concatenate([x[..., -pad_in:], x, x[..., :pad_in]], axis=-1)
+    y = resample_poly(wrapped, up, down, axis=-1)
+    n_out = n * up // down
+    return y[..., k * up:k * up + n_out].astype(np.float32)
+
+def stretch_loop(x, n_out):
+    """
+    FFT resample of a periodic buffer to exactly n_out samples. Stays seamless;
+    pitch and tempo move by len(x) / n_out, a few cents for frame padding.
+    """
+    from scipy.signal import resample
+    if n_out == x.shape[-1]:
+        return x
+    return resample(x, n_out, axis=-1).astype(np.float32)
 
-    # Equal-power windows
+def analyze_render_rate(x, sr=BASE_SR, floor_db=AUTO_RATE_FLOOR_DB):
+    """
+    Lowest rate in RENDER_RATES whose usable band (0.45 * rate) holds all but
+    floor_db of the signal's energy.
+    """
+    power = np.abs(np.fft.rfft(x)) ** 2
+    if power.ndim > 1:
+        power = power.sum(axis=0)
+    above = 1.0 - np.cumsum(power) / (np.sum(power) + 1e-20)
+    limit = 10 ** (floor_db / 10)
+    for rate in RENDER_RATES:
+        if rate >= sr:
+            break
+        cutoff_bin = int(0.45 * rate * x.shape[-1] / sr)
+        if above[cutoff_bin] < limit:
+            return rate
+    return sr
+
+@lru_cache(maxsize=None)
+def fade_windows(fade):
+    """
+    Equal-power (fade-out, fade-in) windows of `fade` samples, shared read-only.
+    """
     w = np.linspace(0.0, 1.0, fade, endpoint=False)
     a = np.cos(w * np.pi / 2)  # goes 1 -> 0
     b = np.sin(w * np.pi / 2)  # goes 0 -> 1
+    a.setflags(write=False)
+    b.setflags(write=False)
+    return a, b
 
-    blended = tail * a + head * b
-    y = x.copy()
-    y[:fade] = blended
-    y[-fade:] = blended
-    return y
+def loop_fade(n, fade_ms=FADE_MS):
+    """
+    Crossfade length in samples for a loop of n samples at the render rate.
+    """
+    fade = int(SR * (fade_ms / 1000.0))
+    return max(8, min(fade, n // 4))
 
-def make_loop_perfect(x):
-    x = normalize(x, 0.95)
-    x = equal_power_crossfade_loop(x, FADE_MS)
-    x = normalize(x, 0.95)
-    return x.astype(np.float32)
+def equal_power_crossfade_loop(x, fade_ms=FADE_MS, out=None):
+    """
+    Enforce seamless boundary by blending the last fade segment into the first
+    fade segment once and dropping it from the end: the head runs tail -> head,
+    so the (now fade samples shorter) loop ends on the sample just before the
+    blend started. This removes clicks if there’s any residual mismatch.
+    Writes into `out` (shape (..., n - fade); may be a view of x's start)
+    when given; otherwise into a new array.
+    """
+    n = x.shape[-1]
+    fade = loop_fade(n, fade_ms)
+    a, b = fade_windows(fade)
+
+    if out is None:
+        out = np.empty(x.shape[:-1] + (n - fade,), dtype=np.result_type(x, a))
+    blended = pooled("blend", x.shape[:-1] + (fade,), np.result_type(out, a))
+    scratch = pooled("blend_b", blended.shape, blended.dtype)
+    np.multiply(x[..., -fade:], a, out=blended)
+    np.multiply(x[..., :fade], b, out=scratch)
+    blended += scratch
+    if not np.may_share_memory(out, x):
+        out[..., fade:] = x[..., fade:n - fade]
+    out[..., :fade] = blended
+    return out
+
+def make_loop_perfect(x, out=None):
+    """
+    normalize -> crossfade -> normalize -> float32, done in place on a pooled
+    scratch buffer. The loop comes back loop_fade() samples shorter (see
+    equal_power_crossfade_loop). The float32 result goes into `out` when
+    given, otherwise into a new array (the only allocation per sound).
+    """
+    work = pooled("finish", x.shape, x.dtype if x.dtype.kind == "f" else np.float64)
+    normalize(x, 0.95, out=work)
+    n = x.shape[-1] - loop_fade(x.shape[-1])
+    work = equal_power_crossfade_loop(work, FADE_MS, out=work[..., :n])
+    normalize(work, 0.95, out=work)
+    if out is None:
+        out = np.empty(work.shape, dtype=np.float32)
+    np.copyto(out, work, casting="same_kind")
+    return out
+
+# ----------------------------
+# Loop length
+# ----------------------------
+
+def trace_loop(fn):
+    """
+    Runs fn once at DURATION and records what makes it periodic:
+    {"partials": loop-length sine frequencies, "grids": event steps in seconds,
+    "random": whether it drew from np.random or a noise node, "global_rng":
+    whether it drew from np.random, "beds": full-length seamless_noise()
+    calls, "graph": the Node it returned, if any}. The global RNG is left
+    untouched.
+    None of that depends on the samples, so the trace runs at TRACE_RATE
+    with filters and reverb skipped, and a returned graph is only walked,
+    not evaluated: a small fraction of a real render.
+    """
+    global LOOP_TRACE
+    state = np.random.get_state()
+    LOOP_TRACE = {"partials": [], "grids": [], "random": False, "beds": 0, "graph": None}
+    try:
+        with render_rate(TRACE_RATE):
+            x = fn()
+        if isinstance(x, Node):
+            LOOP_TRACE["graph"] = x
+            for node in graph_nodes(x):
+                if node[0] == "sine":
+                    LOOP_TRACE["partials"].append(node[1])
+                elif node[0] == "noise":
+                    LOOP_TRACE["random"] = True
+        after = np.random.get_state()
+        trace = LOOP_TRACE
+    finally:
+        LOOP_TRACE = None
+        np.random.set_state(state)
+    trace["global_rng"] = after[2] != state[2] or not np.array_equal(after[1], state[1])
+    trace["random"] |= trace["global_rng"]
+    return trace
+
+def lock_drift_cents(cycles):
+    """
+    Pitch change, in cents, from rounding `cycles` to the whole number of
+    cycles cycles_locked_sine() renders.
+    """
+    return np.abs(1200 * np.log2(np.maximum(1, np.round(cycles)) / cycles))
+
+def seamless_lengths(trace, rate, multiple=1, min_seconds=MIN_LOOP_SECONDS):
+    """
+    Loop lengths in samples, between min_seconds and DURATION, at which every
+    event grid lands on whole steps and every partial fits whole cycles while
+    drifting at most PARTIAL_TOLERANCE_CENTS (or its drift at DURATION, if
+    larger) from its nominal frequency. Only multiples of `multiple` count.
+    """
+    full = int(round(rate * DURATION))
+    n = np.arange(-(-int(round(rate * min_seconds)) // multiple) * multiple, full + 1, multiple)
+    ok = np.ones(len(n), dtype=bool)
+    for step_s in trace["grids"]:
+        ok &= n % int(rate * step_s) == 0
+    for f in trace["partials"]:
+        allowed = max(PARTIAL_TOLERANCE_CENTS, lock_drift_cents(f * DURATION))
+        ok &= lock_drift_cents(f * n / rate) <= allowed + 1e-9
+    return n[ok]
+
+def shortest_loop(trace, rate, multiple=1):
+    """
+    Loop length in seconds for a traced generator. Deterministic sounds get the
+    shortest seamless length; sounds built from noise or random events keep as
+    much of DURATION as their event grids allow, since a short noise loop is
+    heard repeating.
+    """
+    lengths = seamless_lengths(trace, rate, multiple)
+    if len(lengths) == 0:
+        return DURATION
+    return int(lengths[-1] if trace["random"] else lengths[0]) / rate
+
+# ----------------------------
+# Rooms (convolution reverb)
+# ----------------------------
+
+# name -> (RT60 seconds, tail damping lowpass Hz, IR seed)
+ROOMS = {
+    "library": (1.4, 3500, 11),
+    "cafe": (0.8, 5000, 12),
+    "canyon": (3.5, 1500, 13),
+    "tower": (4.0, 2500, 14),
+}
+
+_room_spectra = {}
+
+@lru_cache(maxsize=None)
+def room_ir(room, sr):
+    """
+    Synthetic impulse response: seeded noise under an exponential decay that
+    reaches -60 dB at RT60, darkened by the room's damping lowpass. Built once
+    per (room, rate); uses its own RNG so it never shifts the global draws.
+    """
+    rt60, damping_hz, seed = ROOMS[room]
+    n = int(sr * rt60)
+    t = np.arange(n) / sr
+    noise = np.random.RandomState(seed).randn(n)
+    with render_rate(sr):
+        ir = lowpass(noise, damping_hz) * np.exp(-6.91 * t / rt60)
+    return (ir / np.sqrt(np.sum(ir ** 2))).astype(np.float32)
+
+def room_spectrum(room, n):
+    """
+    rfft of the room IR folded onto an n-sample circle, cached per (room, n, SR)
+    so every sound of the same length reuses it.
+    """
+    key = (room, n, SR)
+    if key not in _room_spectra:
+        ir = room_ir(room, SR)
+        folded = np.zeros(-(-len(ir) // n) * n, dtype=np.float64)
+        folded[:len(ir)] = ir
+        # a periodic input hears every wrap of the tail, so sum them
+        _room_spectra[key] = np.fft.rfft(folded.reshape(-1, n).sum(axis=0))
+    return _room_spectra[key]
+
+def reverb(x, room, wet=0.35):
+    """
+    Circular (FFT) convolution with a cached room IR: O(n log n) whatever the
+    IR length, and the wet signal stays periodic over the loop.
+    """
+    if isinstance(x, Node):
+        return Node(("reverb", x, room, wet))
+    if LOOP_TRACE is not None:
+        return x
+    n = x.shape[-1]
+    y = np.fft.irfft(np.fft.rfft(x) * room_spectrum(room, n), n=n)
+    y *= np.sqrt(np.mean(np.square(x)) / (np.mean(np.square(y)) + 1e-20))
+    return (1.0 - wet) * x + wet * y
+
+# ----------------------------
+# DSP graph
+# ----------------------------
+
+# A generator may return a Node graph instead of samples: sources (sine,
+# noise) go through filters (lowpass, highpass, reverb accept nodes too) and
+# are modulated and mixed with + - *. Nodes are hashable tuples, so identical
+# subgraphs compare equal: evaluate() computes each once per render, and
+# inside graph_cache() once per catalog build. A noise node is seeded, so
+# sounds that name the same seed share those samples; give a bed its own
+# seed where sounds may be layered together.
+
+GRAPH_CACHE = None   # subgraph outputs shared across a build; see graph_cache()
+
+class Node(tuple):
+    # numpy defers to __radd__/__rmul__/... instead of coercing the tuple into
+    # an object array (ndarray * Node would otherwise be silent garbage)
+    __array_ufunc__ = None
+
+    def __add__(self, other):
+        return Node(("add", self, other))
+
+    def __radd__(self, other):
+        return Node(("add", other, self))
+
+    def __sub__(self, other):
+        return Node(("sub", self, other))
+
+    def __rsub__(self, other):
+        return Node(("sub", other, self))
+
+    def __mul__(self, other):
+        return Node(("mul", self, other))
+
+    def __rmul__(self, other):
+        return Node(("mul", other, self))
+
+def sine(freq_hz, amp=1.0):
+    """
+    Loop-length cycles_locked_sine() as a graph source.
+    """
+    return Node(("sine", freq_hz, amp))
+
+def noise(seed):
+    """
+    seamless_noise()-style bed as a graph source. The seed names the bed:
+    it is drawn from default_rng(seed), inside noise_bank() too (batched
+    with the build's other seeded beds), and graph_cache() hands every
+    sound naming that seed the same samples.
+    """
+    return Node(("noise", seed))
+
+def graph_nodes(node):
+    """
+    Every distinct Node reachable from node, children first.
+    """
+    seen = {}
+    stack = [(node, False)]
+    while stack:
+        n, expanded = stack.pop()
+        if not isinstance(n, Node) or n in seen:
+            continue
+        if expanded:
+            seen[n] = None
+        else:
+            stack.append((n, True))
+            stack.extend((child, False) for child in n[1:])
+    return list(seen)
+
+def compute_node(node, inputs):
+    op = node[0]
+    if op == "sine":
+        return cycles_locked_sine(node[1], node[2])
+    if op == "noise":
+        if LOOP_TRACE is not None:
+            LOOP_TRACE["random"] = True
+        bed = bank_seeded_bed(node[1], loop_samples()) if NOISE_BANK is not None else None
+        if bed is None:
+            bed = noise_beds(np.random.default_rng(node[1]), 1, loop_samples(), CHANNELS)[0]
+        return bed
+    if op == "filter":
+        return butter_filter(inputs[0], node[2], node[3])
+    if op == "reverb":
+        return reverb(inputs[0], node[2], node[3])
+    a, b = inputs
+    if op == "add":
+        return a + b
+    if op == "sub":
+        return a - b
+    if op == "mul":
+        return a * b
+    raise ValueError(f"unknown graph op {op!r}")
+
+def evaluate(node, shared=True):
+    """
+    Renders a graph at the current rate, loop length and channel count.
+    With shared, subgraph outputs held by graph_cache() are reused.
+    """
+    memo = {}
+    key_tail = (SR, loop_samples(), CHANNELS)
+    cache = GRAPH_CACHE if shared else None
+    for n in graph_nodes(node):
+        key = (n,) + key_tail
+        if cache is not None and key in cache["outputs"]:
+            x = cache["outputs"][key]
+        else:
+            x = compute_node(n, [memo.get(child, child) for child in n[1:]])
+        if cache is not None and cache["refs"].get(key, 0) > 1:
+            x.setflags(write=False)
+            cache["outputs"][key] = x
+        if cache is not None and key in cache["refs"]:
+            cache["refs"][key] -= 1
+            if cache["refs"][key] <= 0:
+                cache["outputs"].pop(key, None)
+        memo[n] = x
+    return memo[node] if isinstance(node, Node) else node
+
+@contextmanager
+def graph_cache(plan):
+    """
+    Shares subgraph outputs across renders. plan is {(node, rate, n,
+    channels): number of renders that need it} (see catalog_graph_plan);
+    outputs needed more than once are kept until their last use.
+    """
+    global GRAPH_CACHE
+    prev = GRAPH_CACHE
+    GRAPH_CACHE = {"refs": dict(plan), "outputs": {}}
+    try:
+        yield
+    finally:
+        GRAPH_CACHE = prev
 
 # ----------------------------
 # Export utilities
 # ----------------------------
 
-def write_wav(path, x):
-    sf.write(path, x, SR, subtype="PCM_16")
+SF_CODECS = {"mp3": ("MP3", "MPEG_LAYER_III"), "ogg": ("OGG", "VORBIS"), "opus": ("OGG", "OPUS"),
+             "wav": ("WAV", "PCM_16")}
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+SF_WRITE_BLOCK = 65536
+DEFAULT_SETTINGS = {"mp3": MP3_BITRATE, "ogg": OGG_QUALITY, "opus": OPUS_BITRATE, "wav": None}
 
-def export_mp3_ffmpeg(wav_path, mp3_path, bitrate=MP3_BITRATE):
+def ensure_out_dir():
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+def write_wav(path, x, sr=None):
+    import soundfile as sf
+    sf.write(path, x.T, sr or SR, subtype="PCM_16")
+
+@lru_cache(maxsize=None)
+def ffmpeg_available():
+    try:
+        subprocess.run(["ffmpeg", "-version"], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return True
+    except Exception:
+        return False
+
+def soundfile_supports(fmt, sr):
+    import soundfile as sf
+    container, subtype = SF_CODECS[fmt]
+    if subtype not in sf.available_subtypes(container):
+        return False
+    return fmt != "opus" or sr in OPUS_RATES
+
+def backend_for(fmt, sr):
+    if ENCODER_BACKENDS.get(fmt, "soundfile") == "soundfile" and soundfile_supports(fmt, sr):
+        return "soundfile"
+    return "ffmpeg"
+
+def kbps(bitrate):
+    return int(str(bitrate).lower().rstrip("k"))
+
+def sf_compression_level(fmt, setting, sr):
+    """
+    Maps an ffmpeg-style setting (a bitrate like "192k", or Vorbis -q:a 0-10)
+    onto libsndfile's 0..1 compression level.
+    """
+    if fmt == "ogg":
+        level = 1.0 - float(setting) / 10.0
+    elif fmt == "opus":
+        level = (256 - kbps(setting)) / (256 - 6)
+    else:
+        # CBR range depends on the MPEG version implied by the sample rate
+        lo, hi = (32, 320) if sr >= 32000 else (8, 160) if sr >= 16000 else (8, 64)
+        level = (hi - kbps(setting)) / (hi - lo)
+    return min(max(level, 0.0), 0.99)
+
+def export_soundfile(x, path, fmt, setting, sr):
+    """
+    In-process encode of the float32 buffer. MP3 without a setting is VBR at
+    MP3_VBR_QUALITY, like export_mp3_ffmpeg's default; an explicit bitrate is
+    written constant-bitrate. WAV is 16-bit PCM.
+    """
+    import soundfile as sf
+    container, subtype = SF_CODECS[fmt]
+    extra = {}
+    if fmt == "mp3" and setting is None:
+        # libsndfile hands LAME compression_level * 10 as the VBR quality
+        extra = {"bitrate_mode": "VARIABLE", "compression_level": float(MP3_VBR_QUALITY) / 10}
+    elif fmt != "wav":
+        if fmt == "mp3":
+            extra["bitrate_mode"] = "CONSTANT"
+        extra["compression_level"] = sf_compression_level(fmt, setting or DEFAULT_SETTINGS[fmt], sr)
+    frames = x.T   # soundfile wants (samples, channels)
+    with sf.SoundFile(path, "w", sr, x.shape[0] if x.ndim > 1 else 1, subtype=subtype, format=container,
+                      **extra) as f:
+        # libsndfile's Vorbis encoder crashes on very large single writes
+        for i in range(0, len(frames), SF_WRITE_BLOCK):
+            f.write(frames[i:i + SF_WRITE_BLOCK])
+
+def export_mp3_ffmpeg(wav_path, mp3_path, bitrate=MP3_BITRATE, vbr_quality=MP3_VBR_QUALITY):
     """
     Uses FFmpeg’s libmp3lame, which writes gapless metadata that many players honor.
+    Pass vbr_quality=None for a true constant bitrate (-q:a otherwise selects VBR).
     """
     cmd = [
         "ffmpeg", "-y",
@@ -105,12 +828,13 @@ def export_mp3_ffmpeg(wav_path, mp3_path, bitrate=MP3_BITRATE):
         "-codec:a", "libmp3lame",
         "-b:a", bitrate,
         "-joint_stereo", "1",
-        "-q:a", "2",
-        mp3_path
     ]
+    if vbr_quality is not None:
+        cmd += ["-q:a", str(vbr_quality)]
+    cmd.append(mp3_path)
     subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
-def export_ogg_ffmpeg(wav_path, ogg_path, quality="5"):
+def export_ogg_ffmpeg(wav_path, ogg_path, quality=OGG_QUALITY):
     """
     OGG is typically the most reliable for seamless loops in games.
     """
@@ -123,179 +847,564 @@ def export_ogg_ffmpeg(wav_path, ogg_path, quality="5"):
     ]
     subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
-def export_sound(name, x, mp3=True, ogg_optional=True):
+def export_opus_ffmpeg(wav_path, opus_path, bitrate=OPUS_BITRATE):
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", wav_path,
+        "-codec:a", "libopus",
+        "-b:a", bitrate,
+        opus_path
+    ]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def encode_audio(x, out_path, fmt, setting=None, sr=None, wav_path=None):
     """
-    Writes WAV temp, then MP3 and optionally OGG.
+    Encodes x to out_path with the backend chosen by backend_for(). The ffmpeg
+    path reads a 16-bit WAV of x: wav_path if given, else a temporary one.
+    setting=None uses the format's default export settings.
+    Returns the backend used.
+    """
+    sr = sr or SR
+    backend = backend_for(fmt, sr)
+    if backend == "soundfile":
+        export_soundfile(x, out_path, fmt, setting, sr)
+        return backend
+
+    if not ffmpeg_available():
+        raise RuntimeError(f"FFmpeg not found on PATH and libsndfile cannot encode {fmt} at {sr} Hz. "
+                           "Install FFmpeg or add it to PATH.")
+    with tempfile.TemporaryDirectory() as td:
+        if wav_path is None:
+            wav_path = os.path.join(td, "source.wav")
+            write_wav(wav_path, x, sr)
+        if fmt == "mp3" and setting is None:
+            export_mp3_ffmpeg(wav_path, out_path)
+        elif fmt == "mp3":
+            export_mp3_ffmpeg(wav_path, out_path, bitrate=setting, vbr_quality=None)
+        elif fmt == "ogg":
+            export_ogg_ffmpeg(wav_path, out_path, quality=setting or OGG_QUALITY)
+        else:
+            export_opus_ffmpeg(wav_path, out_path, bitrate=setting or OPUS_BITRATE)
+    return backend
+
+def export_sound(name, x, mp3=True, ogg_optional=True, opus=False, sr=BASE_SR, pad_frames=False,
+                 finish=True, peaks=True, preview=True, wav=False, settings=None):
     """
-    x = make_loop_perfect(x)
+    Writes MP3, optionally OGG, Opus and WAV, at the sound's render rate, with
+    the default settings or those in settings ({format: setting}). A temp WAV
+    is only written when some format has to go through ffmpeg.
+    pad_frames stretches the finished loop to a whole number of codec frames.
+    finish=False skips make_loop_perfect for buffers that are already
+    seamless and level-set (e.g. pre-mixed soundscapes).
+    peaks writes <name>.peaks for the shop's waveform from the same buffer, and
+    preview a low-bitrate <name>_preview clip in each format (see make_preview).
+    Returns the sound's loop-manifest entry (see measure_loop_points).
+    """
+    formats = [fmt for fmt, on in (("mp3", mp3), ("ogg", ogg_optional), ("opus", opus), ("wav", wav)) if on]
+    ensure_out_dir()
+
+    with render_rate(sr):
+        if finish:
+            x = make_loop_perfect(x)
+        if pad_frames:
+            x = pad_to_frames(x, formats, sr)
 
+    if peaks:
+        write_peaks(os.path.join(OUT_DIR, f"{name}.peaks"), x, sr)
+
+    entry = {"sample_rate": sr, "length": x.shape[-1], "channels": x.shape[0] if x.ndim > 1 else 1}
     with tempfile.TemporaryDirectory() as td:
-        wav_path = os.path.join(td, f"{name}.wav")
-        write_wav(wav_path, x)
+        wav_path = None
+        if any(backend_for(fmt, sr) == "ffmpeg" for fmt in formats):
+            wav_path = os.path.join(td, f"{name}.wav")
+            write_wav(wav_path, x, sr)
+
+        for fmt in formats:
+            out_path = os.path.join(OUT_DIR, f"{name}.{fmt}")
+            encode_audio(x, out_path, fmt, (settings or {}).get(fmt), sr=sr, wav_path=wav_path)
+            entry[fmt] = measure_loop_points(out_path, fmt, x)
+
+    if preview:
+        export_preview(name, x, formats, sr)
+    return entry
+
+def pad_to_frames(x, formats, sr):
+    """
+    Stretches a finished loop to a whole number of codec frames of every format.
+    """
+    frame = 1
+    for fmt in formats:
+        frame = np.lcm(frame, codec_frame_size(fmt, sr))
+    return stretch_loop(x, -(-x.shape[-1] // frame) * frame)
+
+def make_preview(x, sr, seconds=PREVIEW_SECONDS, fade_ms=PREVIEW_FADE_MS):
+    """
+    First `seconds` of a finished buffer with raised-cosine fades at both ends.
+    Loops shorter than that are repeated up to it.
+    """
+    n = int(sr * seconds)
+    if x.shape[-1] < n:
+        x = np.concatenate([x] * -(-n // x.shape[-1]), axis=-1)
+    clip = x[..., :n].copy()
+    f = min(int(sr * fade_ms / 1000), n // 2)
+    ramp = (0.5 - 0.5 * np.cos(np.linspace(0, np.pi, f, endpoint=False))).astype(clip.dtype)
+    clip[..., :f] *= ramp
+    clip[..., n - f:] *= ramp[::-1]
+    return clip
+
+def export_preview(name, x, formats, sr):
+    clip = make_preview(x, sr)
+    for fmt in formats:
+        encode_audio(clip, os.path.join(OUT_DIR, f"{name}_preview.{fmt}"), fmt, PREVIEW_SETTINGS[fmt], sr)
+
+# ----------------------------
+# Loop points
+# ----------------------------
+
+MP3_DECODER_DELAY = 529   # samples every MP3 decoder adds ahead of the encoder delay
+MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+def codec_frame_size(fmt, sr):
+    if fmt == "mp3":
+        return 1152 if sr >= 32000 else 576
+    if fmt == "opus":
+        return sr // 50   # 20 ms packets
+    return 1              # Vorbis granule positions are sample-exact
+
+def mp3_frame_info(path):
+    """
+    Walks the MP3 frame headers. Returns (audio_frames, samples_per_frame,
+    enc_delay, enc_padding); delay/padding come from the LAME tag, or 0.
+    """
+    data = open(path, "rb").read()
+    pos = 0
+    if data[:3] == b"ID3":
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size
+
+    frames = 0
+    spf = 1152
+    enc_delay = enc_padding = 0
+    first = True
+    while pos + 4 <= len(data):
+        h = int.from_bytes(data[pos:pos + 4], "big")
+        version = (h >> 19) & 3
+        bitrate_idx = (h >> 12) & 15
+        rate_idx = (h >> 10) & 3
+        if (h >> 21) != 0x7FF or version == 1 or ((h >> 17) & 3) != 1 \
+                or bitrate_idx in (0, 15) or rate_idx == 3:
+            break
+        mpeg1 = version == 3
+        spf = 1152 if mpeg1 else 576
+        bitrate = MP3_BITRATES[1 if mpeg1 else 2][bitrate_idx] * 1000
+        length = (spf // 8) * bitrate // MP3_RATES[version][rate_idx] + ((h >> 9) & 1)
+
+        frame = data[pos:pos + length]
+        tag = max(frame.find(b"Xing"), frame.find(b"Info"))
+        if first and tag >= 0:
+            # the Xing/Info frame decodes to nothing; its LAME extension carries
+            # the encoder delay and padding as two 12-bit fields
+            lame = frame.find(b"LAME", tag)
+            if lame >= 0 and lame + 24 <= len(frame):
+                b = frame[lame + 21:lame + 24]
+                enc_delay = (b[0] << 4) | (b[1] >> 4)
+                enc_padding = ((b[1] & 0x0F) << 8) | b[2]
+        else:
+            frames += 1
+        first = False
+        pos += length
+
+    return frames, spf, enc_delay, enc_padding
+
+def find_offset(ref, decoded):
+    """
+    Offset of ref inside decoded, by cross-correlation over the lags where
+    all of ref still fits.
+    """
+    n = len(ref)
+    size = len(decoded) + n
+    corr = np.fft.irfft(np.fft.rfft(decoded, size) * np.conj(np.fft.rfft(ref, size)), n=size)
+    return int(np.argmax(corr[:max(1, len(decoded) - n + 1)]))
+
+def measure_loop_points(path, fmt, x):
+    """
+    Decodes an exported file and measures where the n-sample loop sits in the
+    decoder output. MP3 offsets are for a decoder that ignores gapless
+    metadata (as Android's MediaPlayer/SoundPool often do): every audio frame
+    is emitted, led by the encoder + decoder delay. Ogg offsets are for the
+    granule-trimmed stream, which Ogg decoders always produce.
+    """
+    import soundfile as sf
+    if x.ndim > 1:
+        x = x.mean(axis=0)
+    n = len(x)
+    decoded, _ = sf.read(path, dtype="float32")
+    if decoded.ndim > 1:
+        decoded = decoded.mean(axis=1)
+
+    if fmt == "mp3":
+        frames, spf, enc_delay, _ = mp3_frame_info(path)
+        delay = enc_delay + MP3_DECODER_DELAY
+        total = frames * spf
+    else:
+        enc_delay = 0   # Vorbis pre-skip is trimmed by every decoder
+        delay = find_offset(x, decoded)
+        total = len(decoded)
+
+    return {
+        "loop_start": delay,
+        "loop_end": delay + n,
+        # the LAME tag's delay alone; loop_start already adds MP3_DECODER_DELAY
+        "encoder_delay": enc_delay,
+        "padding": total - delay - n,
+        "decoded_length": total,
+        # a gapless-aware decode should give back exactly the loop
+        "gapless_exact": len(decoded) == n,
+    }
+
+def load_codec_choices():
+    """
+    {name: (format, setting)} picked per sound by codec_bench.py, or {} when
+    OUT_DIR has no CODEC_TABLE.
+    """
+    path = os.path.join(OUT_DIR, CODEC_TABLE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        table = json.load(f)
+    return {name: (e["recommended"]["format"], e["recommended"]["setting"]) for name, e in table["sounds"].items()}
+
+def write_loop_manifest(entries):
+    """
+    Merges {name: entry} into OUT_DIR/LOOP_MANIFEST, keeping other sounds' entries.
+    """
+    ensure_out_dir()
+    path = os.path.join(OUT_DIR, LOOP_MANIFEST)
+    manifest = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    manifest.update(entries)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(manifest.items())), f, indent=2)
+
+# ----------------------------
+# Waveform peaks
+# ----------------------------
+
+PEAKS_MAGIC = b"PEAK"
+PEAKS_VERSION = 1
+
+def compute_peaks(x, levels=PEAK_LEVELS):
+    """
+    int8 (buckets, 2) min/max arrays, one per zoom level. The finest level is
+    one vectorized reduceat pass over the PCM; coarser levels are reduced from
+    it, so each must divide the one before.
+    """
+    n = x.shape[-1]
+    starts = (np.arange(levels[0]) * n) // levels[0]
+    lo = np.minimum.reduceat(x, starts, axis=-1)
+    hi = np.maximum.reduceat(x, starts, axis=-1)
+    if x.ndim > 1:   # one envelope across all channels
+        lo, hi = lo.min(axis=0), hi.max(axis=0)
+
+    out = []
+    for buckets in levels:
+        k = len(lo) // buckets
+        lo, hi = lo.reshape(buckets, k).min(axis=1), hi.reshape(buckets, k).max(axis=1)
+        pair = np.stack([lo, hi], axis=1)
+        out.append(np.clip(np.round(pair * 127), -127, 127).astype(np.int8))
+    return out
+
+def write_peaks(path, x, sr, levels=PEAK_LEVELS):
+    """
+    Little-endian, memory-mappable layout:
+      "PEAK", u8 version, u8 level count, u16 0, u32 sample rate, u32 length,
+      u32 buckets per level, then each level's int8 [min, max] pairs in order.
+    """
+    data = compute_peaks(x, levels)
+    header = PEAKS_MAGIC + struct.pack("<BBHII", PEAKS_VERSION, len(levels), 0, sr, x.shape[-1])
+    header += struct.pack(f"<{len(levels)}I", *levels)
+    with open(path, "wb") as f:
+        f.write(header)
+        for level in data:
+            f.write(level.tobytes())
+
+# ----------------------------
+# Bitrate search
+# ----------------------------
+
+def align_to_reference(ref, decoded):
+    """
+    Undo encoder delay/padding: find the offset of the reference inside the
+    decoded stream and cut out exactly len(ref) samples.
+    """
+    n = len(ref)
+    if decoded.ndim > 1:
+        decoded = decoded.mean(axis=1)
+    lag = find_offset(ref, decoded)
+    y = np.zeros(n, dtype=np.float32)
+    seg = decoded[lag:lag + n]
+    y[:len(seg)] = seg
+    return y
 
-        if mp3:
-            mp3_path = os.path.join(OUT_DIR, f"{name}.mp3")
-            export_mp3_ffmpeg(wav_path, mp3_path)
+def band_edges(frame, sr, bands_per_octave=3, f_lo=40.0):
+    """
+    Fractional-octave band edges as rfft bin indices for a given frame size.
+    """
+    n_octaves = np.log2((sr / 2) / f_lo)
+    freqs = f_lo * 2.0 ** (np.arange(int(n_octaves * bands_per_octave) + 1) / bands_per_octave)
+    edges = np.unique(np.round(freqs * frame / sr).astype(int))
+    return edges[edges <= frame // 2]
 
-        if ogg_optional:
-            ogg_path = os.path.join(OUT_DIR, f"{name}.ogg")
-            export_ogg_ffmpeg(wav_path, ogg_path)
+def spectral_distance(ref, test, sr=None, frame=2048, floor_db=60.0):
+    """
+    RMS distance in dB between the 1/3-octave band energies of two aligned
+    signals, over STFT frames and bands within floor_db of the reference peak.
+    Band energies (not single bins) are compared so that a codec's noise
+    substitution is not penalised where the ear cannot tell the difference.
+    """
+    n = min(len(ref), len(test))
+    hop = frame // 2
+    count = max(1, (n - frame) // hop + 1)
+    idx = np.arange(frame)[None, :] + hop * np.arange(count)[:, None]
+    win = np.hanning(frame).astype(np.float32)
+    edges = band_edges(frame, sr or SR)
+
+    def band_db(x):
+        power = np.abs(np.fft.rfft(x[idx] * win, axis=1)) ** 2
+        return 10 * np.log10(np.add.reduceat(power, edges, axis=1)[:, :-1] + 1e-12)
+
+    ref_db = band_db(ref)
+    test_db = band_db(test)
+    mask = ref_db > ref_db.max() - floor_db
+    return float(np.sqrt(np.mean((ref_db[mask] - test_db[mask]) ** 2)))
+
+def encode_candidate(x, wav_path, out_path, fmt, setting, ref, sr):
+    import soundfile as sf
+    encode_audio(x, out_path, fmt, setting, sr, wav_path)
+    decoded, sr = sf.read(out_path, dtype="float32")
+    dist = spectral_distance(ref, align_to_reference(ref, decoded), sr)
+    return setting, out_path, os.path.getsize(out_path), dist
+
+def optimize_sound(name, x, pool, max_distance=MAX_SPECTRAL_DISTANCE_DB, sr=BASE_SR, pad_frames=False):
+    """
+    Encodes every rung of the MP3 and OGG ladders in parallel and keeps the
+    smallest candidate within max_distance of the source and within
+    MAX_DISTANCE_OVER_TOP_DB of the top rung's distance (the spectral
+    measure has a floor of its own, so an absolute threshold alone lets
+    sounds with little high-frequency content fall to the bottom rung).
+    The top rung is kept when nothing lower qualifies. pad_frames stretches
+    the finished loop to whole codec frames as export_sound does.
+    Returns ([(filename, setting, distance, old_bytes, new_bytes), ...], loop-manifest entry).
+    """
+    import soundfile as sf
+    ensure_out_dir()
+    with render_rate(sr):
+        x = make_loop_perfect(x)
+        if pad_frames:
+            x = pad_to_frames(x, ["mp3", "ogg"], sr)
+    write_peaks(os.path.join(OUT_DIR, f"{name}.peaks"), x, sr)
+    report = []
+    entry = {"sample_rate": sr, "length": x.shape[-1], "channels": x.shape[0] if x.ndim > 1 else 1}
+
+    with tempfile.TemporaryDirectory() as td, render_rate(sr):
+        wav_path = os.path.join(td, f"{name}.wav")
+        write_wav(wav_path, x)
+        # score against what the encoder actually receives (16-bit PCM)
+        ref, _ = sf.read(wav_path, dtype="float32")
+
+        for fmt, ladder in (("mp3", MP3_BITRATE_LADDER), ("ogg", OGG_QUALITY_LADDER)):
+            jobs = [
+                pool.submit(encode_candidate, x, wav_path,
+                            os.path.join(td, f"{name}_{i}.{fmt}"), fmt, setting, ref, sr)
+                for i, setting in enumerate(ladder)
+            ]
+            results = [j.result() for j in jobs]
+            limit = min(max_distance, results[-1][3] + MAX_DISTANCE_OVER_TOP_DB)
+            passing = [r for r in results if r[3] <= limit] or [results[-1]]
+            setting, path, size, dist = min(passing, key=lambda r: r[2])
+
+            dest = os.path.join(OUT_DIR, f"{name}.{fmt}")
+            old_size = os.path.getsize(dest) if os.path.exists(dest) else results[-1][2]
+            shutil.copyfile(path, dest)
+            entry[fmt] = measure_loop_points(dest, fmt, x)
+            report.append((os.path.basename(dest), setting, dist, old_size, size))
+
+    export_preview(name, x, ["mp3", "ogg"], sr)
+    return report, entry
+
+def optimize_catalog(max_distance=MAX_SPECTRAL_DISTANCE_DB, aliases=None, seeds=None, pad_frames=False):
+    saved = 0
+    loops = {name: alias_entry(name, canonical) for name, canonical in (aliases or {}).items()}
+    seeds = seeds or {}
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+        for name in SOUND_MAP:
+            if name in loops:
+                continue
+            x, rate = seeded_render(name, seeds[name]) if name in seeds else render_sound(name)
+            report, loops[name] = optimize_sound(name, x, pool, max_distance, rate, pad_frames)
+            for fname, setting, dist, old_size, new_size in report:
+                saved += old_size - new_size
+                print(f"{fname}: {setting or 'default'} ({dist:.2f} dB) {old_size} -> {new_size} bytes")
+    write_loop_manifest(loops)
+    print(f"Total saved across {OUT_DIR}/: {saved} bytes ({saved / 1024:.1f} KiB)")
 
 # ----------------------------
 # Sound designs (loop-friendly)
 # ----------------------------
 
+# Generators either render samples directly or return a DSP graph (see Node).
+# Graph noise is seeded: each bed names its own seed (sound number x 10, plus
+# the layer), so only truly identical subgraphs are shared.
+
 def forest_whispers():
-    x = seamless_noise()
-    x = lowpass(x, 1200)
+    x = lowpass(noise(20), 1200)
     # slow “wind” amplitude modulation that is also periodic
-    mod = 0.65 + 0.35 * cycles_locked_sine(0.10, amp=1.0)
+    mod = 0.65 + 0.35 * sine(0.10)
     return x * mod
 
 def crunchy_taps():
     # create a periodic impulse train and shape each impulse (wrap-safe)
-    n = int(SR * DURATION)
-    x = np.zeros(n, dtype=np.float32)
-    step = int(SR * 0.18)  # taps every 180ms
+    n = loop_samples()
+    x = np.zeros(shape(n), dtype=np.float32)
     width = int(SR * 0.008)
-    for i in range(0, n, step):
-        seg = highpass(seamless_noise(duration=width / SR), 2500)[:width]
-        x[i:i+width] += seg
+    for i in event_onsets(n, 0.18):  # taps every 180ms
+        seg = highpass(seamless_noise(duration=width / SR), 2500)[..., :width]
+        x[..., i:i+width] += seg
     x = highpass(x, 3000)
     return x
 
 def ocean_waves():
-    x = seamless_noise()
-    x = lowpass(x, 600)
-    swell = 0.4 + 0.6 * (0.5 + 0.5 * cycles_locked_sine(0.08))
+    x = lowpass(noise(40), 600)
+    swell = 0.4 + 0.6 * (0.5 + 0.5 * sine(0.08))
     return x * swell
 
 def cat_purr():
-    base = cycles_locked_sine(30, 0.9) + cycles_locked_sine(60, 0.35)
-    breath = 0.7 + 0.3 * (0.5 + 0.5 * cycles_locked_sine(0.35))
+    base = sine(30, 0.9) + sine(60, 0.35)
+    breath = 0.7 + 0.3 * (0.5 + 0.5 * sine(0.35))
     return base * breath
 
 def cozy_fire():
     x = seamless_noise()
     x = lowpass(x, 2200)
     # add sparse “crackle” bursts
-    n = len(x)
-    crack = np.zeros(n, dtype=np.float32)
-    step = int(SR * 0.12)
+    n = x.shape[-1]
+    crack = np.zeros(shape(n), dtype=np.float32)
     width = int(SR * 0.004)
-    for i in range(0, n, step):
+    for i in event_onsets(n, 0.12):
         if np.random.rand() > 0.65:
-            seg = highpass(seamless_noise(duration=width / SR), 3500)[:width]
-            crack[i:i+width] += seg * 0.8
+            seg = highpass(seamless_noise(duration=width / SR), 3500)[..., :width]
+            crack[..., i:i+width] += seg * 0.8
     return x * 0.7 + crack * 0.6
 
 def magic_chimes():
     # layered locked sines with gentle periodic tremolo
-    tones = (cycles_locked_sine(880, 0.35) +
-             cycles_locked_sine(1320, 0.25) +
-             cycles_locked_sine(1760, 0.18))
-    trem = 0.6 + 0.4 * (0.5 + 0.5 * cycles_locked_sine(0.25))
+    tones = (sine(880, 0.35) +
+             sine(1320, 0.25) +
+             sine(1760, 0.18))
+    trem = 0.6 + 0.4 * (0.5 + 0.5 * sine(0.25))
     return tones * trem
 
 def page_flips():
     x = highpass(seamless_noise(), 2500)
-    mod = (np.random.rand(len(x)) > 0.997).astype(np.float32)
-    # smooth the random gate a bit via lowpass to avoid harsh zipper
-    mod = lowpass(mod, 40)
+    # random gate, smoothed by the lowpass kernel to avoid harsh zipper
+    mod = sparse_gate(0.003, 40)
     return x * mod * 2.0
 
 def snow_crunch():
-    x = highpass(seamless_noise(), 1600)
+    x = highpass(noise(90), 1600)
     x = lowpass(x, 7000)
-    mod = 0.5 + 0.5 * (0.5 + 0.5 * cycles_locked_sine(1.2))
+    mod = 0.5 + 0.5 * (0.5 + 0.5 * sine(1.2))
     return x * mod
 
 def keyboard_clicks():
     return crunchy_taps()
 
 def ticking_clock():
-    n = int(SR * DURATION)
+    n = loop_samples()
     x = np.zeros(n, dtype=np.float32)
-    step = int(SR * 1.0)
     click_len = int(SR * 0.02)
     click = cycles_locked_sine(1500, 1.0, duration=click_len / SR)[:click_len]
     click = highpass(click, 600)
-    for i in range(0, n, step):
+    for i in event_onsets(n, 1.0):
         x[i:i+click_len] += click * 0.6
     return x
 
 def bubble_wrap():
-    n = int(SR * DURATION)
-    x = np.zeros(n, dtype=np.float32)
-    step = int(SR * 0.13)
+    n = loop_samples()
+    x = np.zeros(shape(n), dtype=np.float32)
     pop_len = int(SR * 0.012)
-    for i in range(0, n, step):
+    for i in event_onsets(n, 0.13):
         if np.random.rand() > 0.5:
-            burst = highpass(seamless_noise(duration=pop_len / SR), 2200)[:pop_len]
+            burst = highpass(seamless_noise(duration=pop_len / SR), 2200)[..., :pop_len]
             env = np.linspace(1, 0, pop_len, endpoint=False)
-            x[i:i+pop_len] += burst * env
+            x[..., i:i+pop_len] += burst * env
     return x
 
 def white_noise():
-    return seamless_noise()
+    return noise(130)
 
 def deep_hum():
-    return (cycles_locked_sine(50, 0.9) + cycles_locked_sine(100, 0.25)) * (0.7 + 0.3 * (0.5 + 0.5 * cycles_locked_sine(0.12)))
+    return (sine(50, 0.9) + sine(100, 0.25)) * (0.7 + 0.3 * (0.5 + 0.5 * sine(0.12)))
 
 def rainforest():
     x = seamless_noise()
     x = lowpass(x, 3000)
-    birds = (cycles_locked_sine(2500, 0.10) * (np.random.rand(len(x)) > 0.9992).astype(np.float32))
+    birds = (cycles_locked_sine(2500, 0.10) * (np.random.rand(x.shape[-1]) > 0.9992).astype(np.float32))
     birds = lowpass(birds, 3000)
     rain = lowpass(seamless_noise(), 3500) * 0.5
     return x * 0.35 + rain * 0.55 + birds
 
 def stream_flow():
-    x = lowpass(seamless_noise(), 900)
-    return x * (0.7 + 0.3 * (0.5 + 0.5 * cycles_locked_sine(0.20)))
+    x = lowpass(noise(160), 900)
+    return x * (0.7 + 0.3 * (0.5 + 0.5 * sine(0.20)))
 
 def zen_garden():
-    x = lowpass(seamless_noise(), 700)
-    grit = highpass(seamless_noise(), 2200) * 0.15
+    x = lowpass(noise(170), 700)
+    grit = highpass(noise(171), 2200) * 0.15
     return x * 0.85 + grit
 
 def wind_chimes():
-    base = (cycles_locked_sine(660, 0.28) +
-            cycles_locked_sine(990, 0.20) +
-            cycles_locked_sine(1320, 0.16))
-    sway = 0.6 + 0.4 * (0.5 + 0.5 * cycles_locked_sine(0.18))
+    base = (sine(660, 0.28) +
+            sine(990, 0.20) +
+            sine(1320, 0.16))
+    sway = 0.6 + 0.4 * (0.5 + 0.5 * sine(0.18))
     return base * sway
 
 def vinyl_static():
-    x = highpass(seamless_noise(), 4000)
+    x = highpass(noise(190), 4000)
     x = lowpass(x, 12000)
     return x
 
 def bowl_sing():
     # stable resonance: add a few harmonics, all cycle-locked
-    x = (cycles_locked_sine(220, 0.7) +
-         cycles_locked_sine(440, 0.18) +
-         cycles_locked_sine(660, 0.10))
-    return x * (0.85 + 0.15 * (0.5 + 0.5 * cycles_locked_sine(0.07)))
+    x = (sine(220, 0.7) +
+         sine(440, 0.18) +
+         sine(660, 0.10))
+    return x * (0.85 + 0.15 * (0.5 + 0.5 * sine(0.07)))
 
 def rain_on_tin():
     x = highpass(seamless_noise(), 2200)
     # “raindrop” pings
-    n = len(x)
-    p = (np.random.rand(n) > 0.9995).astype(np.float32)
-    p = lowpass(p, 90)
+    n = x.shape[-1]
+    p = sparse_gate(0.0005, 90, n)
     return x * 0.7 + p * 0.6
 
 def library_ambience():
-    x = lowpass(seamless_noise(), 900) * 0.5
-    air = lowpass(seamless_noise(), 2500) * 0.25
-    return x + air
+    x = lowpass(noise(220), 900) * 0.5
+    air = lowpass(noise(221), 2500) * 0.25
+    return reverb(x + air, "library", 0.4)
 
 def coffee_shop():
     murmur = lowpass(seamless_noise(), 2000) * 0.6
-    clink_gate = (np.random.rand(len(murmur)) > 0.9994).astype(np.float32)
-    clinks = highpass(seamless_noise(), 2500) * lowpass(clink_gate, 50) * 1.2
-    return murmur + clinks
+    clink_gate = sparse_gate(0.0006, 50)
+    clinks = highpass(seamless_noise(), 2500) * clink_gate * 1.2
+    return reverb(murmur + clinks, "cafe", 0.3)
 
 def crickets():
     # periodic chirp oscillator with gated bursts
@@ -305,85 +1414,81 @@ def crickets():
     return carrier * gate
 
 def space_drone():
-    x = cycles_locked_sine(22, 0.8) + cycles_locked_sine(44, 0.35)
-    slow = 0.65 + 0.35 * (0.5 + 0.5 * cycles_locked_sine(0.05))
+    x = sine(22, 0.8) + sine(44, 0.35)
+    slow = 0.65 + 0.35 * (0.5 + 0.5 * sine(0.05))
     return x * slow
 
 def submarine():
     hum = cycles_locked_sine(28, 0.7) + cycles_locked_sine(56, 0.22)
-    ping_gate = (np.random.rand(int(SR * DURATION)) > 0.9992).astype(np.float32)
-    ping = cycles_locked_sine(900, 0.25) * lowpass(ping_gate, 30)
+    ping = cycles_locked_sine(900, 0.25) * sparse_gate(0.0008, 30)
     return hum + ping
 
 def train_tracks():
     # loop-safe rhythm
-    n = int(SR * DURATION)
-    x = np.zeros(n, dtype=np.float32)
-    step = int(SR * 0.24)
+    n = loop_samples()
+    x = np.zeros(shape(n), dtype=np.float32)
     clack_len = int(SR * 0.02)
-    clack = highpass(seamless_noise(duration=clack_len / SR), 1200)[:clack_len]
+    clack = highpass(seamless_noise(duration=clack_len / SR), 1200)[..., :clack_len]
     env = np.linspace(1, 0, clack_len, endpoint=False)
-    for i in range(0, n, step):
-        x[i:i+clack_len] += clack * env * 1.2
+    for i in event_onsets(n, 0.24):
+        x[..., i:i+clack_len] += clack * env * 1.2
     bed = lowpass(seamless_noise(), 500) * 0.25
     return x + bed
 
 def thunder():
-    x = lowpass(seamless_noise(), 180) * 1.2
-    rumble = cycles_locked_sine(18, 0.35)
+    x = lowpass(noise(280), 180) * 1.2
+    rumble = sine(18, 0.35)
     return x + rumble
 
 def grass_rustle():
-    x = highpass(seamless_noise(), 1200)
+    x = highpass(noise(290), 1200)
     x = lowpass(x, 8000)
-    return x * (0.6 + 0.4 * (0.5 + 0.5 * cycles_locked_sine(0.9)))
+    return x * (0.6 + 0.4 * (0.5 + 0.5 * sine(0.9)))
 
 def sand_pour():
-    x = lowpass(seamless_noise(), 1200)
-    grit = highpass(seamless_noise(), 2500) * 0.25
+    x = lowpass(noise(300), 1200)
+    grit = highpass(noise(301), 2500) * 0.25
     return x * 0.75 + grit
 
 def plastic_crinkle():
     x = highpass(seamless_noise(), 3000)
-    gate = (np.random.rand(len(x)) > 0.9988).astype(np.float32)
-    gate = lowpass(gate, 70)
+    gate = sparse_gate(0.0012, 70)
     return x * gate * 2.0
 
 def soap_carving():
-    x = highpass(seamless_noise(), 2000)
+    x = highpass(noise(320), 2000)
     x = lowpass(x, 9000)
-    return x * (0.7 + 0.3 * (0.5 + 0.5 * cycles_locked_sine(1.1)))
+    return x * (0.7 + 0.3 * (0.5 + 0.5 * sine(1.1)))
 
 def pencil_sketch():
-    x = highpass(seamless_noise(), 1800)
+    x = highpass(noise(330), 1800)
     x = lowpass(x, 7000)
     return x * 0.8
 
 def ice_clink():
-    n = int(SR * DURATION)
+    n = loop_samples()
     x = np.zeros(n, dtype=np.float32)
-    step = int(SR * 0.9)
     hit_len = int(SR * 0.06)
     ring = cycles_locked_sine(2200, 0.35, duration=hit_len / SR)[:hit_len]
     env = np.exp(-np.linspace(0, 5, hit_len, endpoint=False))
-    for i in range(0, n, step):
+    for i in event_onsets(n, 0.9):
         x[i:i+hit_len] += ring * env
     return x
 
 def fan_whir():
-    hum = cycles_locked_sine(120, 0.75)
-    air = lowpass(seamless_noise(), 900) * 0.18
+    hum = sine(120, 0.75)
+    air = lowpass(noise(350), 900) * 0.18
     return hum + air
 
 def heart_beat():
-    n = int(SR * DURATION)
+    n = loop_samples()
     x = np.zeros(n, dtype=np.float32)
     # two-beat pattern per second
     pattern = [0.0, 0.20]  # seconds offset within 1s
     beat_len = int(SR * 0.09)
-    for sec in range(int(DURATION)):
+    for start in event_onsets(n, 1.0):
         for off in pattern:
-            i = int((sec + off) * SR)
+            i = start + int(off * SR)
             if i + beat_len <= n:
                 thump = cycles_locked_sine(70, 0.8, duration=beat_len / SR)[:beat_len]
                 env = np.exp(-np.linspace(0, 6, beat_len, endpoint=False))
@@ -392,111 +1497,107 @@ def heart_beat():
 
 def boiling_water():
     x = lowpass(seamless_noise(), 1600)
-    bubbles = (np.random.rand(len(x)) > 0.9992).astype(np.float32)
-    bubbles = lowpass(bubbles, 80)
+    bubbles = sparse_gate(0.0008, 80)
     fizz = highpass(seamless_noise(), 2500) * bubbles * 0.9
     return x * 0.65 + fizz
 
 def windy_canyon():
-    x = lowpass(seamless_noise(), 500)
-    gust = 0.5 + 0.5 * (0.5 + 0.5 * cycles_locked_sine(0.07))
-    return x * (0.4 + 0.6 * gust)
+    x = lowpass(noise(380), 500)
+    gust = 0.5 + 0.5 * (0.5 + 0.5 * sine(0.07))
+    return reverb(x * (0.4 + 0.6 * gust), "canyon", 0.5)
 
 def scissor_snip():
-    n = int(SR * DURATION)
-    x = np.zeros(n, dtype=np.float32)
-    step = int(SR * 0.7)
+    n = loop_samples()
+    x = np.zeros(shape(n), dtype=np.float32)
     snip_len = int(SR * 0.03)
-    for i in range(0, n, step):
-        snip = highpass(seamless_noise(duration=snip_len / SR), 3200)[:snip_len]
+    for i in event_onsets(n, 0.7):
+        snip = highpass(seamless_noise(duration=snip_len / SR), 3200)[..., :snip_len]
         env = np.linspace(1, 0, snip_len, endpoint=False)
-        x[i:i+snip_len] += snip * env * 1.3
+        x[..., i:i+snip_len] += snip * env * 1.3
     return x
 
 def brush_strokes():
-    x = lowpass(seamless_noise(), 900)
-    texture = highpass(seamless_noise(), 2000) * 0.12
+    x = lowpass(noise(400), 900)
+    texture = highpass(noise(401), 2000) * 0.12
     return x + texture
 
 def bee_buzz():
     # add a little harmonic + slow drift
-    x = cycles_locked_sine(220, 0.85) + cycles_locked_sine(440, 0.15)
-    drift = 0.8 + 0.2 * (0.5 + 0.5 * cycles_locked_sine(0.3))
+    x = sine(220, 0.85) + sine(440, 0.15)
+    drift = 0.8 + 0.2 * (0.5 + 0.5 * sine(0.3))
     return x * drift
 
 def frogs():
     carrier = cycles_locked_sine(300, 0.35)
-    gate = (np.random.rand(int(SR * DURATION)) > 0.9985).astype(np.float32)
-    gate = lowpass(gate, 25)
+    gate = sparse_gate(0.0015, 25)
     return carrier * gate
 
 def dripping_tap():
-    n = int(SR * DURATION)
+    n = loop_samples()
     x = np.zeros(n, dtype=np.float32)
-    step = int(SR * 1.1)
     drip_len = int(SR * 0.08)
     drip = cycles_locked_sine(1200, 0.45, duration=drip_len / SR)[:drip_len]
     env = np.exp(-np.linspace(0, 6, drip_len, endpoint=False))
-    for i in range(0, n, step):
+    for i in event_onsets(n, 1.1):
         x[i:i+drip_len] += drip * env
     return x
 
 def paper_rip():
     x = highpass(seamless_noise(), 2500)
-    gate = (np.random.rand(len(x)) > 0.999).astype(np.float32)
-    gate = lowpass(gate, 35)
+    gate = sparse_gate(0.001, 35)
     return x * gate * 2.0
 
 def wooden_blocks():
-    n = int(SR * DURATION)
+    n = loop_samples()
     x = np.zeros(n, dtype=np.float32)
-    step = int(SR * 0.5)
     hit_len = int(SR * 0.05)
     hit = cycles_locked_sine(650, 0.5, duration=hit_len / SR)[:hit_len]
     env = np.exp(-np.linspace(0, 7, hit_len, endpoint=False))
-    for i in range(0, n, step):
+    for i in event_onsets(n, 0.5):
         x[i:i+hit_len] += hit * env
     return x
 
 def clock_tower():
     # distant bell: low sine + mild modulation
-    x = cycles_locked_sine(200, 0.7) + cycles_locked_sine(400, 0.18)
-    return x * (0.8 + 0.2 * (0.5 + 0.5 * cycles_locked_sine(0.06)))
+    x = sine(200, 0.7) + sine(400, 0.18)
+    x = x * (0.8 + 0.2 * (0.5 + 0.5 * sine(0.06)))
+    return reverb(x, "tower", 0.45)
 
 def dry_leaves():
     x = highpass(seamless_noise(), 1000)
-    gate = (np.random.rand(len(x)) > 0.9986).astype(np.float32)
-    gate = lowpass(gate, 60)
+    gate = sparse_gate(0.0014, 60)
     return x * gate * 1.8
 
 def marble_roll():
     # smooth rolling tone + subtle noise bed
-    tone = cycles_locked_sine(820, 0.25)
-    bed = lowpass(seamless_noise(), 900) * 0.12
+    tone = sine(820, 0.25)
+    bed = lowpass(noise(480), 900) * 0.12
     return tone + bed
 
 def whale_song():
-    x = cycles_locked_sine(15, 0.85) + cycles_locked_sine(25, 0.35)
-    swell = 0.6 + 0.4 * (0.5 + 0.5 * cycles_locked_sine(0.03))
+    x = sine(15, 0.85) + sine(25, 0.35)
+    swell = 0.6 + 0.4 * (0.5 + 0.5 * sine(0.03))
     return x * swell
 
 def supernova():
     # cinematic: noise + sub drone + shimmer, all loop-safe
-    n = seamless_noise()
-    n = lowpass(n, 6000) * 0.6
-    sub = cycles_locked_sine(28, 0.45)
-    shimmer = highpass(seamless_noise(), 6000) * 0.12
+    n = lowpass(noise(500), 6000) * 0.6
+    sub = sine(28, 0.45)
+    shimmer = highpass(noise(501), 6000) * 0.12
     return n + sub + shimmer
 
 # ----------------------------
 # Mapping & batch export
 # ----------------------------
 
+# Values are a generator, or (generator, render_rate) for sounds whose content
+# sits well below the default Nyquist. render_rate is a sample rate in Hz, or
+# "auto" to render at BASE_SR and resample to the rate analyze_render_rate picks.
 SOUND_MAP = {
     "sound_002": forest_whispers,
     "sound_003": crunchy_taps,
-    "sound_004": ocean_waves,
-    "sound_005": cat_purr,
+    "sound_004": (ocean_waves, "auto"),
+    "sound_005": (cat_purr, 11025),
     "sound_006": cozy_fire,
     "sound_007": magic_chimes,
     "sound_008": page_flips,
@@ -505,9 +1606,9 @@ SOUND_MAP = {
     "sound_011": ticking_clock,
     "sound_012": bubble_wrap,
     "sound_013": white_noise,
-    "sound_014": deep_hum,
+    "sound_014": (deep_hum, 11025),
     "sound_015": rainforest,
-    "sound_016": stream_flow,
+    "sound_016": (stream_flow, "auto"),
     "sound_017": zen_garden,
     "sound_018": wind_chimes,
     "sound_019": vinyl_static,
@@ -516,10 +1617,10 @@ SOUND_MAP = {
     "sound_022": library_ambience,
     "sound_023": coffee_shop,
     "sound_024": crickets,
-    "sound_025": space_drone,
+    "sound_025": (space_drone, 11025),
     "sound_026": submarine,
     "sound_027": train_tracks,
-    "sound_028": thunder,
+    "sound_028": (thunder, 11025),
     "sound_029": grass_rustle,
     "sound_030": sand_pour,
     "sound_031": plastic_crinkle,
@@ -527,9 +1628,9 @@ SOUND_MAP = {
     "sound_033": pencil_sketch,
     "sound_034": ice_clink,
     "sound_035": fan_whir,
-    "sound_036": heart_beat,
+    "sound_036": (heart_beat, "auto"),
     "sound_037": boiling_water,
-    "sound_038": windy_canyon,
+    "sound_038": (windy_canyon, "auto"),
     "sound_039": scissor_snip,
     "sound_040": brush_strokes,
     "sound_041": bee_buzz,
@@ -540,22 +1641,427 @@ SOUND_MAP = {
     "sound_046": clock_tower,
     "sound_047": dry_leaves,
     "sound_048": marble_roll,
-    "sound_049": whale_song,
+    "sound_049": (whale_song, 11025),
     "sound_050": supernova,
 }
 
-def main():
-    # Quick check that ffmpeg exists
+def sound_entry(name):
+    """
+    (generator, render_rate) for a SOUND_MAP entry; plain generators render at BASE_SR.
+    """
+    entry = SOUND_MAP[name]
+    if isinstance(entry, tuple):
+        return entry
+    return entry, BASE_SR
+
+@lru_cache(maxsize=None)
+def loop_trace(name):
+    """
+    (trace_loop() of a SOUND_MAP entry, rate it was traced at). "auto"
+    entries render, and so are traced, at BASE_SR.
+    """
+    fn, rate = sound_entry(name)
+    if rate == "auto":
+        rate = BASE_SR
+    with render_rate(rate):
+        return trace_loop(fn), rate
+
+@lru_cache(maxsize=None)
+def loop_duration(name):
+    """
+    Seconds a SOUND_MAP entry loops over (see shortest_loop). "auto" entries
+    are kept to lengths every RENDER_RATES rate divides evenly, so the
+    resample after rendering stays seamless.
+    """
+    trace, rate = loop_trace(name)
+    multiple = 1
+    if sound_entry(name)[1] == "auto":
+        for r in RENDER_RATES:
+            multiple = np.lcm(multiple, BASE_SR // gcd(BASE_SR, r))
+    return shortest_loop(trace, rate, int(multiple))
+
+def catalog_noise_plan(names, channels=1, full_length=False):
+    """
+    {(rate, n, channels): beds} over SOUND_MAP entries, for noise_bank().
+    """
+    plan = {}
+    for name in names:
+        trace, rate = loop_trace(name)
+        seconds = DURATION if full_length else loop_duration(name)
+        key = (rate, int(round(rate * seconds)), channels)
+        plan[key] = plan.get(key, 0) + trace["beds"]
+    return plan
+
+def catalog_seed_plan(names, channels=1, full_length=False):
+    """
+    {(rate, n, channels): [seeds]} of the graph noise nodes of SOUND_MAP
+    entries, for noise_bank(seeded=...). A seed counts once per shape
+    however many sounds share it.
+    """
+    plan = {}
+    for name in names:
+        trace, rate = loop_trace(name)
+        if trace["graph"] is None:
+            continue
+        seconds = DURATION if full_length else loop_duration(name)
+        key = (rate, int(round(rate * seconds)), channels)
+        seeds = plan.setdefault(key, [])
+        seeds += [node[1] for node in graph_nodes(trace["graph"]) if node[0] == "noise" and node[1] not in seeds]
+    return plan
+
+def catalog_graph_plan(names, channels=1, full_length=False):
+    """
+    {(node, rate, n, channels): renders that need it} over the graph-based
+    SOUND_MAP entries, for graph_cache().
+    """
+    plan = {}
+    for name in names:
+        trace, rate = loop_trace(name)
+        if trace["graph"] is None:
+            continue
+        seconds = DURATION if full_length else loop_duration(name)
+        n = int(round(rate * seconds))
+        for node in graph_nodes(trace["graph"]):
+            key = (node, rate, n, channels)
+            plan[key] = plan.get(key, 0) + 1
+    return plan
+
+def run_generator(fn):
+    """
+    Samples of a generator, evaluating it when it returns a graph.
+    """
+    x = fn()
+    return evaluate(x) if isinstance(x, Node) else x
+
+def render_sound(name, channels=1, full_length=False):
+    """
+    Renders a SOUND_MAP entry at its render rate, over loop_duration(name)
+    unless full_length asks for DURATION. Returns (samples, rate);
+    samples are (channels, n) when channels > 1, with parts of the generator
+    that carry no noise (sines, tonal clicks) shared by every channel.
+    """
+    fn, rate = sound_entry(name)
+    seconds = DURATION if full_length else loop_duration(name)
+    with render_channels(channels), render_duration(seconds):
+        if rate == "auto":
+            x = run_generator(fn)
+            rate = analyze_render_rate(x)
+            x = resample_loop(x, BASE_SR, rate)
+        else:
+            with render_rate(rate):
+                x = run_generator(fn)
+    if channels > 1 and x.ndim == 1:
+        x = np.tile(x, (channels, 1))
+    return x, rate
+
+# ----------------------------
+# Duplicates
+# ----------------------------
+
+DEDUP_SEED = 0   # every entry renders from this seed when checking for exact duplicates
+DIGEST_CACHE = "render_digests.json"   # {name: {"key", "digest"}}, written inside OUT_DIR
+
+def seeded_render(name, seed=DEDUP_SEED, channels=1, full_length=False):
+    """
+    render_sound() from a fixed np.random seed. Batched noise beds and shared
+    graph outputs are bypassed, so the samples depend on the seed alone: from
+    DEDUP_SEED two entries that are the same sound (e.g. keyboard_clicks,
+    which returns crunchy_taps()) render the same samples.
+    The global RNG is left as it was.
+    """
+    state = np.random.get_state()
+    np.random.seed(seed)
     try:
-        subprocess.run(["ffmpeg", "-version"], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    except Exception:
-        raise RuntimeError("FFmpeg not found on PATH. Install FFmpeg or add it to PATH to export MP3/OGG.")
+        with noise_bank({}), graph_cache({}):
+            return render_sound(name, channels=channels, full_length=full_length)
+    finally:
+        np.random.set_state(state)
+
+def render_digest(x, rate):
+    return hashlib.sha1(f"{rate}:".encode() + np.ascontiguousarray(x, dtype=np.float32).tobytes()).hexdigest()
+
+def stable_repr(value):
+    """
+    repr() for plain data code can depend on; None for anything else
+    (modules, arrays, dicts of functions, ...), which fingerprints leave out.
+    """
+    if isinstance(value, (bool, int, float, str, type(None))):
+        return repr(value)
+    if isinstance(value, (tuple, list)):
+        parts = [stable_repr(v) for v in value]
+        return None if None in parts else f"[{','.join(parts)}]"
+    if isinstance(value, dict):
+        parts = [(stable_repr(k), stable_repr(v)) for k, v in value.items()]
+        return None if any(None in p for p in parts) else repr(sorted(parts))
+    return None
+
+def hash_function(fn, h):
+    """
+    Feeds a function's code and default arguments into h; returns the global
+    names it reads.
+    """
+    h.update(f"{stable_repr(fn.__defaults__)};{stable_repr(fn.__kwdefaults__)};".encode())
+    return hash_code(fn.__code__, h)
+
+def hash_code(code, h):
+    """
+    Feeds a code object's bytecode, constants and names (nested functions
+    too, line numbers not) into h; returns the global names it reads.
+    """
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= hash_code(const, h)
+        else:
+            h.update(repr(const).encode())
+    return names
+
+def code_fingerprint(module, roots, extra=""):
+    """
+    sha1 of the roots' code and, transitively, of every function or class of
+    module they reach and the plain constants (stable_repr) they read. Code
+    is hashed as bytecode, so moving lines or editing comments keeps the
+    fingerprint; private constants (module caches) are left out.
+    """
+    h = hashlib.sha1(extra.encode())
+    scope = vars(module)
+    seen, todo = set(), list(roots)
+    while todo:
+        obj = inspect.unwrap(todo.pop())   # lru_cache and friends
+        if obj in seen:
+            continue
+        seen.add(obj)
+        names = set()
+        if inspect.isfunction(obj):
+            names |= hash_function(obj, h)
+        else:
+            for attr, value in vars(obj).items():
+                value = inspect.unwrap(value)
+                if inspect.isfunction(value):
+                    names |= hash_function(value, h)
+                elif attr not in ("__module__", "__qualname__", "__doc__") and stable_repr(value) is not None:
+                    h.update(f"{attr}={stable_repr(value)};".encode())
+        for ref in sorted(names):
+            if ref not in scope:
+                continue
+            value = scope[ref]
+            target = inspect.unwrap(value) if callable(value) else value
+            if inspect.isfunction(target) or inspect.isclass(target):
+                if getattr(target, "__module__", None) == module.__name__:
+                    todo.append(target)
+            elif not ref.startswith("_") and stable_repr(value) is not None:
+                h.update(f"{ref}={stable_repr(value)};".encode())
+    return h.hexdigest()
+
+def generator_key(name):
+    """
+    Fingerprint of what seeded_render(name) depends on: its generator and the
+    render path (seeded_render, render_sound and everything they reach in
+    this module), its render rate, DEDUP_SEED and the numpy/scipy versions.
+    """
+    import scipy
+    fn, rate = sound_entry(name)
+    return code_fingerprint(sys.modules[__name__], [fn, seeded_render, render_sound],
+                            f"{rate}:{DEDUP_SEED}:{np.__version__}:{scipy.__version__}")
+
+def cached_digests(names=None):
+    """
+    {name: render_digest of seeded_render(name)}. Digests are kept in
+    OUT_DIR/DIGEST_CACHE under generator_key(), so only entries whose code
+    changed are rendered again.
+    """
+    path = os.path.join(OUT_DIR, DIGEST_CACHE)
+    cache = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+    digests = {}
+    for name in names or SOUND_MAP:
+        key = generator_key(name)
+        if cache.get(name, {}).get("key") != key:
+            cache[name] = {"key": key, "digest": render_digest(*seeded_render(name))}
+        digests[name] = cache[name]["digest"]
+    ensure_out_dir()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(cache.items())), f, indent=1)
+    return digests
+
+def catalog_aliases(digests=None):
+    """
+    {alias: canonical} for SOUND_MAP entries whose seeded render is identical
+    to an earlier entry's. digests ({name: render_digest}) come from
+    cached_digests() when not given.
+    """
+    if digests is None:
+        digests = cached_digests()
+    first = {}
+    aliases = {}
+    for name, digest in digests.items():
+        if digest in first:
+            aliases[name] = first[digest]
+        else:
+            first[digest] = name
+    return aliases
+
+def alias_entry(name, canonical):
+    """
+    Loop-manifest entry for an alias. Files exported under the alias by an
+    earlier build are removed so the sound ships once.
+    """
+    for fmt in ("mp3", "ogg", "opus", "peaks"):
+        for stem in (name, f"{name}_preview"):
+            path = os.path.join(OUT_DIR, f"{stem}.{fmt}")
+            if os.path.exists(path):
+                os.remove(path)
+    return {"alias_of": canonical}
+
+# ----------------------------
+# Seed search
+# ----------------------------
+
+# Sounds that draw from np.random ship whatever the build's draw produced.
+# seed_sweep.py renders a range of seeds per sound, scores the finished
+# renders with variant_scores() and locks the winner in SEED_MANIFEST; the
+# export then renders locked sounds once, from their seed.
 
-    for name, fn in SOUND_MAP.items():
-        x = fn()
-        export_sound(name, x, mp3=True, ogg_optional=True)
+SEED_MANIFEST = "seeds.json"   # {name: {"seed", "channels", "full_length", scores...}}, written inside OUT_DIR
+SWEEP_SEEDS = 16               # seeds tried per sound by default
+
+def sweep_candidates(names=None):
+    """
+    SOUND_MAP entries whose render depends on the np.random seed.
+    """
+    return [name for name in names or SOUND_MAP if loop_trace(name)[0]["global_rng"]]
+
+def finished_render(name, seed, channels=1, full_length=False):
+    """
+    seeded_render() finished by make_loop_perfect() as the export does it:
+    (samples, rate).
+    """
+    x, rate = seeded_render(name, seed, channels, full_length)
+    with render_rate(rate):
+        return make_loop_perfect(x), rate
 
-    print(f"Done. Exported to: {OUT_DIR}/ (MP3 + OGG)")
+def variant_scores(renders):
+    """
+    Scores K finished renders of one sound, stacked as (K, [channels,] n),
+    all in dB and lower-is-better:
+      seam_db          jump across the loop point relative to the RMS
+                       sample-to-sample step (0 when no larger)
+      crest_db         peak over RMS
+      loudness_dev_db  distance of the RMS level from the K renders' median
+    Returns {metric: (K,) array, "score": their sum}.
+    """
+    x = renders.reshape(len(renders), -1, renders.shape[-1])
+    step = np.sqrt(np.mean(np.diff(x, axis=-1) ** 2, axis=(1, 2))) + 1e-12
+    jump = np.sqrt(np.mean((x[..., 0] - x[..., -1]) ** 2, axis=1))
+    seam = np.maximum(20 * np.log10(jump / step + 1e-12), 0.0)
+    rms = np.sqrt(np.mean(x ** 2, axis=(1, 2))) + 1e-12
+    crest = 20 * np.log10(np.abs(x).max(axis=(1, 2)) / rms)
+    level = 20 * np.log10(rms)
+    dev = np.abs(level - np.median(level))
+    return {"seam_db": seam, "crest_db": crest, "loudness_dev_db": dev, "score": seam + crest + dev}
+
+def load_seed_manifest(channels=1, full_length=False):
+    """
+    {name: locked seed} from OUT_DIR/SEED_MANIFEST for sounds swept at this
+    export shape, {} before any sweep. A seed is only the best draw of the
+    realization it was scored on: a stereo or full-length render from the
+    same seed is a different one, so locks of another shape are left out.
+    """
+    path = os.path.join(OUT_DIR, SEED_MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return {name: entry["seed"] for name, entry in json.load(f).items()
+                if (entry.get("channels", 1), entry.get("full_length", False)) == (channels, full_length)}
+
+def write_seed_manifest(entries):
+    """
+    Merges {name: entry} into OUT_DIR/SEED_MANIFEST, keeping other sounds' entries.
+    """
+    ensure_out_dir()
+    path = os.path.join(OUT_DIR, SEED_MANIFEST)
+    manifest = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    manifest.update(entries)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(manifest.items())), f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export loop-perfect ASMR sounds as MP3 + OGG.")
+    parser.add_argument("--optimize", action="store_true",
+                        help="search the bitrate ladder per sound and keep the smallest transparent encode")
+    parser.add_argument("--max-distance", type=float, default=MAX_SPECTRAL_DISTANCE_DB,
+                        help="log-spectral distance threshold in dB for --optimize")
+    parser.add_argument("--backend", action="append", default=[], metavar="FMT=BACKEND",
+                        help="encoder per format, e.g. mp3=ffmpeg or ogg=soundfile (repeatable)")
+    parser.add_argument("--opus", action="store_true", help="also export .opus")
+    parser.add_argument("--pad-frames", action="store_true",
+                        help="stretch each loop to a whole number of codec frames before encoding")
+    parser.add_argument("--stereo", action="store_true",
+                        help="render decorrelated stereo (independent noise phases per channel)")
+    parser.add_argument("--no-aliases", action="store_true",
+                        help="export entries that render identically to an earlier one instead of aliasing them")
+    parser.add_argument("--noise-seed", type=int, default=0,
+                        help="seed for the batched noise-bed generator (see noise_bank)")
+    parser.add_argument("--full-length", action="store_true",
+                        help=f"render every loop over DURATION ({DURATION:g}s) instead of its shortest seamless length "
+                             "(not with --optimize, which always encodes shortest loops)")
+    parser.add_argument("--codec-table", action="store_true",
+                        help=f"also export each sound in the format codec_bench.py picked ({OUT_DIR}/{CODEC_TABLE}) "
+                             "and mark it as the one res/raw ships")
+    parser.add_argument("--no-seeds", action="store_true",
+                        help=f"ignore the seeds locked in {OUT_DIR}/{SEED_MANIFEST} (see seed_sweep.py)")
+    args = parser.parse_args()
+
+    for spec in args.backend:
+        fmt, _, backend = spec.partition("=")
+        if fmt not in ENCODER_BACKENDS or backend not in ("soundfile", "ffmpeg"):
+            parser.error(f"bad --backend {spec!r}")
+        ENCODER_BACKENDS[fmt] = backend
+
+    if args.optimize and args.stereo:
+        parser.error("--optimize scores mono renders; drop --stereo")
+    aliases = {} if args.no_aliases else catalog_aliases()
+    channels = 2 if args.stereo else 1
+    # --optimize always scores shortest-length renders
+    full_length = args.full_length and not args.optimize
+    seeds = {} if args.no_seeds else load_seed_manifest(channels, full_length)
+    # locked sounds render from their own seed, outside the batches
+    names = [name for name in SOUND_MAP if name not in aliases and name not in seeds]
+    plan = catalog_noise_plan(names, channels, full_length)
+    shared = catalog_graph_plan(names, channels, full_length)
+    seeded = catalog_seed_plan(names, channels, full_length)
+    with noise_bank(plan, seed=args.noise_seed, seeded=seeded), graph_cache(shared):
+        if args.optimize:
+            optimize_catalog(args.max_distance, aliases, seeds, args.pad_frames)
+            return
+
+        loops = {name: alias_entry(name, canonical) for name, canonical in aliases.items()}
+        choices = load_codec_choices() if args.codec_table else {}
+        for name in SOUND_MAP:
+            if name in loops:
+                continue
+            if name in seeds:
+                x, rate = seeded_render(name, seeds[name], channels, full_length)
+            else:
+                x, rate = render_sound(name, channels=channels, full_length=full_length)
+            fmt, setting = choices.get(name, (None, None))
+            loops[name] = export_sound(name, x, mp3=True, ogg_optional=True, opus=args.opus or fmt == "opus",
+                                       sr=rate, pad_frames=args.pad_frames, wav=fmt == "wav",
+                                       settings={fmt: setting} if fmt else None)
+            if fmt:
+                loops[name]["ship"] = fmt
+    write_loop_manifest(loops)
+
+    print(f"Done. Exported to: {OUT_DIR}/ (MP3 + OGG{' + Opus' if args.opus else ''})")
+    for name, canonical in aliases.items():
+        print(f"{name}: alias of {canonical} (identical render, not exported)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,107 @@
+"""
+Offline soundscape pre-mixer.
+
+Renders curated multi-layer combinations of SOUND_MAP loops into single,
+loudness-matched, seamless assets, so the app plays one loop instead of
+layering several players at runtime.
+
+Every layer is a finished (seamless) loop, so a mix that runs for the least
+common multiple of its layers' loop lengths is itself periodic and needs no
+boundary crossfade. Layers are rendered once and shared by every mix that
+uses them.
+
+Output:
+  exported_sounds/soundscape_*.mp3 / .ogg  (+ loop_points.json entries)
+"""
+
+import numpy as np
+
+import sounds
+
+MIX_LOUDNESS_DB = -20.0   # RMS dBFS every mix is matched to
+PEAK_LIMIT = 0.95
+MAX_MIX_SECONDS = 60.0    # refuse layer combinations whose LCM gets longer than this
+
+# name -> [(SOUND_MAP id, layer gain in dB relative to the other layers), ...]
+# Layers are loudness-matched before their gain is applied.
+SOUNDSCAPES = {
+    "soundscape_rainforest": [("sound_015", 0.0), ("sound_016", -6.0), ("sound_024", -12.0)],   # rainforest, stream, crickets
+    "soundscape_night_pond": [("sound_042", 0.0), ("sound_024", -4.0), ("sound_016", -10.0)],   # frogs, crickets, stream
+    "soundscape_cozy_cabin": [("sound_006", 0.0), ("sound_028", -8.0), ("sound_011", -14.0)],   # fire, thunder, clock
+    "soundscape_deep_sea": [("sound_004", 0.0), ("sound_049", -4.0), ("sound_026", -10.0)],     # ocean, whale song, submarine
+    "soundscape_study_room": [("sound_022", 0.0), ("sound_033", -8.0), ("sound_011", -14.0)],   # library, pencil, clock
+}
+
+
+def rms_db(x):
+    return 20 * np.log10(np.sqrt(np.mean(np.square(x, dtype=np.float64))) + 1e-12)
+
+
+def gain_to(x, target_db):
+    return x * (10 ** ((target_db - rms_db(x)) / 20))
+
+
+def render_layer(name, cache):
+    """
+    Finished loop for a SOUND_MAP entry at its render rate, rendered once per
+    build. Layers are rendered over the full DURATION: shortened loops are
+    rarely commensurate and would blow up the LCM. Returns (samples, rate).
+    """
+    if name not in cache:
+        x, rate = sounds.render_sound(name, full_length=True)
+        with sounds.render_rate(rate):
+            x = sounds.make_loop_perfect(x)
+        cache[name] = (x, rate)
+    return cache[name]
+
+
+def mix_soundscape(layers, cache):
+    """
+    Sums loudness-matched layers over the LCM of their loop lengths, at the
+    highest render rate among them. Returns (mix, rate).
+    """
+    rendered = [(render_layer(name, cache), gain_db) for name, gain_db in layers]
+    rate = max(r for (_, r), _ in rendered)
+
+    conformed = []
+    for (x, r), gain_db in rendered:
+        x = sounds.resample_loop(x, r, rate)
+        conformed.append((gain_to(x, MIX_LOUDNESS_DB + gain_db), len(x)))
+
+    period = int(np.lcm.reduce([n for _, n in conformed]))
+    if period > MAX_MIX_SECONDS * rate:
+        raise ValueError(f"layer loop lengths only repeat after {period / rate:.1f}s "
+                         f"(limit {MAX_MIX_SECONDS:.0f}s)")
+
+    mix = np.zeros(period, dtype=np.float64)
+    for x, n in conformed:
+        mix += np.tile(x, period // n)
+
+    return gain_to(mix, MIX_LOUDNESS_DB), rate
+
+
+def match_mixes(mixes):
+    """
+    Applies one common gain so every mix sits at the same loudness and none
+    exceeds PEAK_LIMIT; the mix with the highest crest factor sets the level.
+    """
+    peak = max(np.max(np.abs(mix)) for mix, _ in mixes.values())
+    gain = min(1.0, PEAK_LIMIT / peak)
+    return {name: ((mix * gain).astype(np.float32), rate) for name, (mix, rate) in mixes.items()}
+
+
+def main():
+    cache = {}
+    mixes = {name: mix_soundscape(layers, cache) for name, layers in SOUNDSCAPES.items()}
+
+    loops = {}
+    for name, (mix, rate) in match_mixes(mixes).items():
+        loops[name] = sounds.export_sound(name, mix, sr=rate, finish=False)
+        print(f"{name}: {len(mix) / rate:.1f}s @ {rate} Hz, {rms_db(mix):.1f} dBFS RMS")
+
+    sounds.write_loop_manifest(loops)
+    print(f"Done. {len(SOUNDSCAPES)} soundscapes from {len(cache)} layer renders in: {sounds.OUT_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
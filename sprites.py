@@ -0,0 +1,162 @@
+"""
+Audio sprite packer.
+
+Concatenates the catalog into a few sprite files plus one JSON index, so the
+app opens and sets up a decoder once instead of once per resource:
+
+  sprite_oneshots.wav        res/raw/pop.wav + res/raw/bubble_pop_*.wav, 16-bit PCM,
+                             small enough to load once into memory
+  sprite_loops_<rate>.ogg    every SOUND_MAP loop (and any res/raw/soundpack_*.wav)
+                             rendered at <rate>; Vorbis seeks are sample-exact
+  sprites.json               {sprite: {sample_rate, entries: {id: {offset, length,
+                             loop_start, loop_end}}}} in sample frames of the
+                             decoded sprite; an alias (sounds.catalog_aliases)
+                             shares its canonical entry
+
+Loops are rendered the way the exporter renders them: from their locked
+seed (seed_sweep.py) or DEDUP_SEED, finished by make_loop_perfect. The
+one-shots are read from what res/raw ships.
+
+Entries are separated by GAP_MS of silence so codec pre-echo from one entry
+never bleeds into its neighbour.
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+import sounds
+
+RAW_DIR = Path("app/src/main/res/raw")
+SPRITE_INDEX = "sprites.json"
+ONE_SHOT_RATE = 44100
+GAP_MS = 50
+PROBE = 8192   # samples of the first entry located in the decoded sprite
+
+
+def read_mono(path):
+    import soundfile as sf
+    x, rate = sf.read(str(path), dtype="float32")
+    if x.ndim > 1:
+        x = x.mean(axis=1)
+    return x, rate
+
+
+def one_shots():
+    """
+    (id, samples) at ONE_SHOT_RATE for res/raw/pop.wav (whichever of pop.py,
+    slimepop.py or slimepop2.py wrote it) and the bubble_pop_* one-shots.
+    """
+    from scipy.signal import resample_poly
+    paths = [RAW_DIR / "pop.wav"] + sorted(RAW_DIR.glob("bubble_pop_[0-9][0-9].wav"))   # not oneshots.py's rate variants
+    for path in paths:
+        if not path.exists():
+            print(f"{path} not generated yet; left out of the sprite")
+            continue
+        x, rate = read_mono(path)
+        yield path.stem, resample_poly(x, ONE_SHOT_RATE, rate).astype(np.float32)
+
+
+def loops(aliases=()):
+    """
+    (id, finished loop, rate) for every SOUND_MAP entry at its render rate,
+    then any soundpack_*.wav (not previews) already generated into res/raw.
+    Aliases are skipped; they share their canonical entry in the index.
+    """
+    seeds = sounds.load_seed_manifest()
+    for name in sounds.SOUND_MAP:
+        if name in aliases:
+            continue
+        yield (name, *sounds.finished_render(name, seeds.get(name, sounds.DEDUP_SEED)))
+    for path in sorted(RAW_DIR.glob("soundpack_*.wav")):
+        if path.stem.endswith("_preview"):
+            continue
+        x, rate = read_mono(path)
+        yield path.stem, x, rate
+
+
+def pack(items, rate, looping, gap_ms=GAP_MS):
+    """
+    Concatenates [(id, samples)] with gap_ms of silence before each entry.
+    Returns (buffer, {id: index entry}); offsets are into the buffer.
+    """
+    gap = np.zeros(int(rate * gap_ms / 1000), dtype=np.float32)
+    parts = []
+    entries = {}
+    offset = 0
+    for sound_id, x in items:
+        parts += [gap, x]
+        offset += len(gap)
+        entry = {"offset": offset, "length": len(x)}
+        if looping:
+            entry["loop_start"] = offset
+            entry["loop_end"] = offset + len(x)
+        entries[sound_id] = entry
+        offset += len(x)
+    parts.append(gap)
+    return np.concatenate(parts), entries
+
+
+def decoded_delay(path, buf, start):
+    """
+    Frames a decoder emits before buf[0]: where the PROBE samples from
+    `start` (the first entry) turn up in the decoded sprite, minus start.
+    Only the head of the sprite is decoded.
+    """
+    import soundfile as sf
+    decoded, _ = sf.read(path, dtype="float32", frames=start + 2 * PROBE)
+    if decoded.ndim > 1:
+        decoded = decoded.mean(axis=1)
+    return sounds.find_offset(buf[start:start + PROBE], decoded) - start
+
+
+def shift_entries(entries, delay):
+    """
+    Moves every offset by the decoder's delay before the buffer's first sample.
+    """
+    for entry in entries.values():
+        for key in ("offset", "loop_start", "loop_end"):
+            if key in entry:
+                entry[key] += delay
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack one-shots and loops into indexed sprite files.")
+    parser.add_argument("--gap-ms", type=float, default=GAP_MS, help="silence between entries")
+    args = parser.parse_args()
+
+    sounds.ensure_out_dir()
+    index = {}
+
+    buf, entries = pack(list(one_shots()), ONE_SHOT_RATE, looping=False, gap_ms=args.gap_ms)
+    name = "sprite_oneshots.wav"
+    sounds.write_wav(os.path.join(sounds.OUT_DIR, name), buf, ONE_SHOT_RATE)
+    index[name] = {"sample_rate": ONE_SHOT_RATE, "entries": entries}
+
+    aliases = sounds.catalog_aliases()
+    by_rate = {}
+    for sound_id, x, rate in loops(aliases):
+        by_rate.setdefault(rate, []).append((sound_id, x))
+    for rate, items in sorted(by_rate.items()):
+        buf, entries = pack(items, rate, looping=True, gap_ms=args.gap_ms)
+        entries.update({alias: entries[target] for alias, target in aliases.items() if target in entries})
+        name = f"sprite_loops_{rate}.ogg"
+        path = os.path.join(sounds.OUT_DIR, name)
+        sounds.encode_audio(buf, path, "ogg", sr=rate)
+        # 0 when the decoder trims the Vorbis pre-skip, as it should
+        first = min(entry["offset"] for entry in entries.values())
+        shift_entries(entries, decoded_delay(path, buf, first))
+        index[name] = {"sample_rate": rate, "entries": entries}
+
+    with open(os.path.join(sounds.OUT_DIR, SPRITE_INDEX), "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+    total = sum(len(s["entries"]) for s in index.values())
+    print(f"Packed {total} sounds into {len(index)} sprites in: {sounds.OUT_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
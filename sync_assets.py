@@ -0,0 +1,197 @@
+"""
+Catalog-aware sync of exported sounds into the app's res/raw.
+
+  python sync_assets.py [--dry-run] [--strict]
+
+Reads the SlimeSound ids from SoundCatalog.kt (create_skus.load_catalog_entries)
+and the raw resources the Kotlin sources name directly, then:
+
+  copies    exported_sounds/<id>.<FORMAT> (and <id>_preview.<FORMAT>) into
+            res/raw, only when the content hash differs from what is there;
+            a loop_points.json "ship" format (sounds.py --codec-table)
+            replaces FORMAT for that id; DATA_ASSETS (similarity.py's
+            neighbor table) are copied the same way
+  aliases   loop_points.json "alias_of" entries become raw resource aliases in
+            res/values/raw_aliases.xml, so a duplicate sound ships once
+  prunes    res/raw files nothing references (and files shadowing an alias or
+            a synced id under another extension, which Gradle rejects)
+  reports   catalog ids and referenced resources that have no asset
+
+Unchanged files are never rewritten, so Gradle's resource merge only sees
+real changes. One-shots and soundpacks that pop.py / slimepop2.py /
+oneshots.py write straight into res/raw are kept as long as something
+references them (or the one-shot a rate variant was made from).
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import shutil
+import sys
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import create_skus
+import oneshots
+import sounds
+
+RAW_DIR = Path("app/src/main/res/raw")
+ALIASES_XML = Path("app/src/main/res/values/raw_aliases.xml")
+KOTLIN_DIR = Path("app/src/main/java")
+FORMAT = "mp3"   # what res/raw ships for catalog sounds without a "ship" format
+
+# Raw names the app builds at runtime rather than spelling out; formatted with
+# the catalog number n of every catalog id (see SoundLibrary.soundpackResId).
+DYNAMIC_RAW_NAMES = ["soundpack_{n:03d}"]
+
+# Generated data files in exported_sounds/ that ship as raw resources under
+# their own name (the app opens them as R.raw.<stem>).
+DATA_ASSETS = ["similar_sounds.json"]
+
+RAW_REFERENCE = re.compile(r'R\.raw\.(\w+)|getIdentifier\(\s*"(\w+)"\s*,\s*"raw"')
+
+
+def file_hash(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def catalog_ids():
+    return [sound_id for sound_id, _, _ in create_skus.load_catalog_entries(create_skus.SOUND_CATALOG, "SlimeSound")]
+
+
+def referenced_names(ids):
+    """
+    Raw resource names the app can ask for: catalog ids, names derived from
+    them at runtime, and every R.raw.x / getIdentifier("x", "raw") in the sources.
+    """
+    names = set(ids)
+    for sound_id in ids:
+        n = sound_id.rpartition("_")[2]
+        if n.isdigit():
+            names.update(pattern.format(n=int(n)) for pattern in DYNAMIC_RAW_NAMES)
+    for path in KOTLIN_DIR.rglob("*.kt"):
+        for match in RAW_REFERENCE.finditer(path.read_text(encoding="utf-8")):
+            names.add(match.group(1) or match.group(2))
+    return names
+
+
+def load_manifest():
+    path = Path(sounds.OUT_DIR) / sounds.LOOP_MANIFEST
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_aliases(manifest):
+    return {name: entry["alias_of"] for name, entry in manifest.items() if "alias_of" in entry}
+
+
+def ship_formats(manifest):
+    return {name: entry["ship"] for name, entry in manifest.items() if "ship" in entry}
+
+
+def aliases_xml(aliases):
+    lines = ['<?xml version="1.0" encoding="utf-8"?>',
+             "<!-- Generated by sync_assets.py from loop_points.json; do not edit. -->",
+             "<resources>"]
+    lines += [f'    <item name="{escape(a)}" type="raw">@raw/{escape(t)}</item>' for a, t in sorted(aliases.items())]
+    lines.append("</resources>")
+    return "\n".join(lines) + "\n"
+
+
+def owner(stem):
+    """
+    The resource a raw file belongs to: previews and oneshots.DEVICE_RATES
+    variants ship with the name they derive from.
+    """
+    for suffix in ["_preview"] + [f"_{rate}" for rate in oneshots.DEVICE_RATES]:
+        if stem.endswith(suffix):
+            return stem[:-len(suffix)]
+    return stem
+
+
+def plan_sync(ids, aliases, formats=None):
+    """
+    Returns (copies [(src, dest)], removals [path], aliases {alias: target},
+    missing [name]) without touching anything. formats maps ids to the
+    format they ship in when it is not FORMAT.
+    """
+    out_dir = Path(sounds.OUT_DIR)
+    wanted = {}
+    for sound_id in ids:
+        fmt = (formats or {}).get(sound_id, FORMAT)
+        for stem in (sound_id, f"{sound_id}_preview"):
+            src = out_dir / f"{stem}.{fmt}"
+            if src.exists() and sound_id not in aliases:
+                wanted[stem] = src
+    for name in DATA_ASSETS:
+        src = out_dir / name
+        if src.exists():
+            wanted[src.stem] = src
+
+    existing = {p.name: p for p in RAW_DIR.glob("*") if p.is_file()} if RAW_DIR.exists() else {}
+    copies = []
+    for stem, src in sorted(wanted.items()):
+        dest = RAW_DIR / src.name
+        if dest.name not in existing or file_hash(dest) != file_hash(src):
+            copies.append((src, dest))
+
+    names = referenced_names(ids)
+    shipped = set(wanted)
+    removals = []
+    for fname, path in sorted(existing.items()):
+        stem = path.stem
+        base = owner(stem)
+        if (base not in names or base in aliases
+                or (stem in wanted and fname != wanted[stem].name)):
+            removals.append(path)
+        else:
+            shipped.add(stem)
+
+    live_aliases = {a: t for a, t in aliases.items() if a in ids and t in shipped}
+    missing = sorted(n for n in names if n not in shipped and n not in live_aliases)
+    return copies, removals, live_aliases, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync exported catalog sounds into res/raw.")
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without changing files")
+    parser.add_argument("--strict", action="store_true", help="exit non-zero when catalog assets are missing")
+    args = parser.parse_args()
+
+    ids = catalog_ids()
+    manifest = load_manifest()
+    copies, removals, aliases, missing = plan_sync(ids, load_aliases(manifest), ship_formats(manifest))
+    xml = aliases_xml(aliases) if aliases else None
+    old_xml = ALIASES_XML.read_text(encoding="utf-8") if ALIASES_XML.exists() else None
+
+    for src, dest in copies:
+        print(f"copy   {src} -> {dest}")
+    for path in removals:
+        print(f"prune  {path}")
+    if xml != old_xml:
+        print(f"write  {ALIASES_XML} ({len(aliases)} aliases)" if xml else f"prune  {ALIASES_XML}")
+    for name in missing:
+        print(f"missing  {name}")
+
+    if not args.dry_run:
+        RAW_DIR.mkdir(parents=True, exist_ok=True)
+        for src, dest in copies:
+            shutil.copyfile(src, dest)
+        for path in removals:
+            path.unlink()
+        if xml != old_xml:
+            if xml:
+                ALIASES_XML.write_text(xml, encoding="utf-8")
+            else:
+                ALIASES_XML.unlink()
+
+    print(f"{len(ids)} catalog sounds: {len(copies)} copied, {len(removals)} pruned, "
+          f"{len(aliases)} aliased, {len(missing)} missing")
+    if args.strict and missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Compact synthesis records for on-device rendering.
+
+Graph-based SOUND_MAP entries (generators that return a sounds.Node) are
+fully described by a handful of numbers. This writes each as a record that
+a device can render instead of shipping its MP3 / OGG, and holds the
+reference renderer those records are defined by:
+
+  record   {"format": "slimepop-synth", "version", "name", "rate", "length",
+            "peak", "nodes", "sha256"}; nodes are listed children first and
+            operands are indices into the list:
+
+            ["const", value]
+            ["sine", cycles, amp]          amp * sin(2 pi cycles i / length)
+            ["noise", seed, scale]         scale * (2u - 1), u from splitmix64(seed)
+            ["filter", src, b, a]          IIR, transposed direct form II,
+                                           state settled by one pass over the loop
+            ["reverb", src, ir_seed, ir_length, rt60, b, a, wet]
+                                           circular convolution with the IR
+                                           (see reverb_ir), wet matched to dry RMS
+            ["add" | "sub" | "mul", x, y]
+
+           The last node is the output, scaled to `peak` and written as
+           float32. Everything is periodic over `length`, so the loop needs
+           no boundary crossfade.
+
+The reference draws its own noise (splitmix64 instead of numpy's spectrum
+noise) and filters periodically, so a record renders a new realization of
+the sound, not the exported samples; the printed deviation is the spectral
+signature distance (fingerprints.signature) from the sounds.py render.
+Event-based and random-gate generators stay audio.
+
+Output:
+  exported_sounds/synth_params.json           {name: record}
+  app/src/test/resources/synth_conformance.json  reference vectors (--vectors)
+
+Each conformance vector renders its record at the record's own length and
+stores VECTOR_LENGTH samples around the loop point (from offset, wrapping),
+plus the sha256 of the whole render. --check re-renders them and fails
+unless they are bit-identical; a port (audio/SynthRenderer.kt, checked by
+SynthConformanceTest) passes when it stays within their `tolerance`.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+import fingerprints
+import sounds
+
+FORMAT = "slimepop-synth"
+VERSION = 1
+PARAMS_FILE = "synth_params.json"   # written inside sounds.OUT_DIR
+VECTORS = Path("app/src/test/resources/synth_conformance.json")
+VECTOR_LENGTH = 1024   # samples stored per conformance vector (op cases render at this length)
+TOLERANCE = 1e-5       # max abs difference a port may have from a vector (output peaks at `peak`)
+PEAK = 0.95
+
+GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def splitmix_uniform(seed, n):
+    """
+    First n outputs of splitmix64 seeded with `seed`, as doubles in [0, 1)
+    from their top 53 bits.
+    """
+    z = np.uint64(seed) + np.arange(1, n + 1, dtype=np.uint64) * GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def butter_coeffs(cutoff_hz, btype, rate):
+    from scipy.signal import butter
+    b, a = butter(4, cutoff_hz / (rate / 2), btype=btype)
+    return [float(v) for v in b], [float(v) for v in a]
+
+
+def graph_record(name):
+    """
+    Record for a graph-based SOUND_MAP entry at its loop length and render
+    rate ("auto" entries at BASE_SR, before the export resamples them), or
+    None for a generator that renders samples itself.
+    """
+    trace, rate = sounds.loop_trace(name)
+    if trace["graph"] is None:
+        return None
+    seconds = sounds.loop_duration(name)
+    length = int(round(rate * seconds))
+    nodes, index = [], {}
+
+    def ref(value):
+        if not isinstance(value, sounds.Node):
+            value = ("const", float(value))
+        if value not in index:
+            nodes.append(encode(value))
+            index[value] = len(nodes) - 1
+        return index[value]
+
+    def encode(node):
+        op = node[0]
+        if op == "const":
+            return ["const", node[1]]
+        if op == "sine":
+            return ["sine", max(1, int(round(node[1] * seconds))), float(node[2])]
+        if op == "noise":
+            return ["noise", int(node[1]), rate / sounds.BASE_SR / np.sqrt(length)]
+        if op == "filter":
+            return ["filter", ref(node[1]), *butter_coeffs(node[2], node[3], rate)]
+        if op == "reverb":
+            rt60, damping_hz, ir_seed = sounds.ROOMS[node[2]]
+            return ["reverb", ref(node[1]), ir_seed, int(rate * rt60), rt60,
+                    *butter_coeffs(damping_hz, "low", rate), float(node[3])]
+        return [op, ref(node[1]), ref(node[2])]
+
+    ref(trace["graph"])
+    return {"format": FORMAT, "version": VERSION, "name": name, "rate": rate, "length": length,
+            "peak": PEAK, "nodes": nodes}
+
+
+def periodic_filter(b, a, x):
+    from scipy.signal import lfilter
+    _, state = lfilter(b, a, x, zi=np.zeros(len(a) - 1))
+    return lfilter(b, a, x, zi=state)[0]
+
+
+def reverb_ir(ir_seed, ir_length, rt60, b, a, rate):
+    """
+    Uniform splitmix64 noise through the damping filter (from rest) under an
+    exponential decay reaching -60 dB at rt60, scaled to unit energy.
+    """
+    from scipy.signal import lfilter
+    t = np.arange(ir_length) / rate
+    ir = lfilter(b, a, 2 * splitmix_uniform(ir_seed, ir_length) - 1) * np.exp(-6.91 * t / rt60)
+    return ir / np.sqrt(np.sum(ir ** 2))
+
+
+def render_record(record, length=None):
+    """
+    Reference render of a record as float32, over `length` samples instead
+    of the record's own when given.
+    """
+    n = length or record["length"]
+    rate = record["rate"]
+    out = []
+    for node in record["nodes"]:
+        op = node[0]
+        if op == "const":
+            y = np.float64(node[1])
+        elif op == "sine":
+            y = node[2] * np.sin(2 * np.pi * node[1] * np.arange(n) / n)
+        elif op == "noise":
+            y = node[2] * (2 * splitmix_uniform(node[1], n) - 1)
+        elif op == "filter":
+            y = periodic_filter(node[2], node[3], out[node[1]])
+        elif op == "reverb":
+            x = out[node[1]]
+            _, ir_seed, ir_length, rt60, b, a, wet = node[1:]
+            ir = reverb_ir(ir_seed, ir_length, rt60, b, a, rate)
+            folded = np.zeros(-(-ir_length // n) * n)
+            folded[:ir_length] = ir
+            wet_y = np.fft.irfft(np.fft.rfft(x) * np.fft.rfft(folded.reshape(-1, n).sum(axis=0)), n=n)
+            wet_y *= np.sqrt(np.mean(x ** 2) / (np.mean(wet_y ** 2) + 1e-20))
+            y = (1.0 - wet) * x + wet * wet_y
+        elif op in ("add", "sub", "mul"):
+            x, z = out[node[1]], out[node[2]]
+            y = x + z if op == "add" else x - z if op == "sub" else x * z
+        else:
+            raise ValueError(f"unknown synth op {op!r}")
+        out.append(y)
+    y = np.broadcast_to(out[-1], (n,))
+    return (y * (record["peak"] / (np.abs(y).max() + 1e-12))).astype(np.float32)
+
+
+def samples_digest(x):
+    return hashlib.sha256(np.ascontiguousarray(x, dtype="<f4").tobytes()).hexdigest()
+
+
+def op_cases():
+    """
+    One small record per op, so a port can be checked op by op before the
+    catalog vectors.
+    """
+    rate = sounds.BASE_SR
+    b, a = butter_coeffs(1000, "low", rate)
+    hb, ha = butter_coeffs(1000, "high", rate)
+    cases = {
+        "op_sine": [["sine", 3, 0.5]],
+        "op_noise": [["noise", 7, 0.01]],
+        "op_lowpass": [["noise", 7, 0.01], ["filter", 0, b, a]],
+        "op_highpass": [["noise", 7, 0.01], ["filter", 0, hb, ha]],
+        "op_mix": [["sine", 5, 1.0], ["const", 0.5], ["mul", 0, 1], ["sine", 2, 0.3], ["add", 2, 3],
+                   ["sub", 4, 1]],
+        "op_reverb": [["sine", 9, 1.0], ["reverb", 0, 11, 600, 0.05, b, a, 0.4]],
+    }
+    return {name: {"format": FORMAT, "version": VERSION, "name": name, "rate": rate, "length": VECTOR_LENGTH,
+                   "peak": PEAK, "nodes": nodes} for name, nodes in cases.items()}
+
+
+def excerpt(x, offset):
+    return np.take(x, np.arange(offset, offset + VECTOR_LENGTH), mode="wrap")
+
+
+def conformance_vectors(records):
+    """
+    {"tolerance", "vectors": [{record, length, offset, sha256, samples
+    (base64 float32 LE)}]} over the op cases and every record, each rendered
+    at its own length; samples are VECTOR_LENGTH of them from offset,
+    wrapping across the loop point.
+    """
+    cases = list(op_cases().values()) + list(records.values())
+    vectors = []
+    for record in cases:
+        record = {k: v for k, v in record.items() if k != "sha256"}
+        x = render_record(record)
+        offset = len(x) - VECTOR_LENGTH // 2 if len(x) > VECTOR_LENGTH else 0
+        vectors.append({"record": record, "length": len(x), "offset": offset, "sha256": samples_digest(x),
+                        "samples": base64.b64encode(excerpt(x, offset).astype("<f4").tobytes()).decode("ascii")})
+    return {"format": FORMAT, "version": VERSION, "tolerance": TOLERANCE, "vectors": vectors}
+
+
+def check_vectors(path=VECTORS):
+    """
+    Re-renders the stored vectors; returns the names that are not
+    bit-identical.
+    """
+    suite = json.loads(path.read_text(encoding="utf-8"))
+    failed = []
+    for vector in suite["vectors"]:
+        x = render_record(vector["record"], vector["length"])
+        expected = np.frombuffer(base64.b64decode(vector["samples"]), dtype="<f4")
+        got = excerpt(x, vector["offset"])
+        if samples_digest(x) != vector["sha256"] or not np.array_equal(got, expected):
+            err = float(np.abs(got - expected).max())
+            print(f"FAIL {vector['record']['name']}: max error {err:.3g}")
+            failed.append(vector["record"]["name"])
+    return failed
+
+
+def exported_bytes(name):
+    return sum(os.path.getsize(p) for p in (os.path.join(sounds.OUT_DIR, f"{name}.{fmt}") for fmt in ("mp3", "ogg"))
+               if os.path.exists(p))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export graph generators as compact synthesis records.")
+    parser.add_argument("--vectors", action="store_true", help=f"also rewrite the conformance vectors in {VECTORS}")
+    parser.add_argument("--check", action="store_true",
+                        help="re-render the conformance vectors and exit non-zero unless bit-identical")
+    args = parser.parse_args()
+
+    if args.check:
+        failed = check_vectors()
+        print(f"{len(failed)} conformance vector(s) failed" if failed else "conformance vectors match")
+        sys.exit(1 if failed else 0)
+
+    records = {}
+    for name in sounds.SOUND_MAP:
+        record = graph_record(name)
+        if record is None:
+            continue
+        x = render_record(record)
+        record["sha256"] = samples_digest(x)
+        records[name] = record
+        y, rate = sounds.seeded_render(name)
+        dev = np.sqrt(np.mean((fingerprints.signature(x, record["rate"]) - fingerprints.signature(y, rate)) ** 2))
+        size = len(json.dumps(record, separators=(",", ":")))
+        print(f"{name} ({sounds.sound_entry(name)[0].__name__}): {len(record['nodes'])} nodes, {size} bytes "
+              f"vs {exported_bytes(name)} exported, {dev:.2f} dB from the sounds.py render")
+
+    sounds.ensure_out_dir()
+    path = os.path.join(sounds.OUT_DIR, PARAMS_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, separators=(",", ":"))
+    print(f"{len(records)} of {len(sounds.SOUND_MAP)} sounds -> {path}")
+
+    if args.vectors:
+        VECTORS.parent.mkdir(parents=True, exist_ok=True)
+        VECTORS.write_text(json.dumps(conformance_vectors(records), separators=(",", ":")) + "\n", encoding="utf-8")
+        print(f"Wrote conformance vectors -> {VECTORS}")
+
+
+if __name__ == "__main__":
+    main()